@@ -28,8 +28,13 @@ import sys
 import argparse
 import hdbscan
 import sklearn.cluster as cluster
-from sklearn.manifold import TSNE
 import numpy as np
+from examinlexica.reduction import project
+from examinlexica.visualize import embed, plot_clusters
+from examinlexica.kmeans_sweep import KMEANS_MODES, kmeans_labels
+from examinlexica.linkage import aggl_labels
+from examinlexica.hdbscan_grid import hdbscan_labels
+from examinlexica.pairwise import METRICS
 from examinlexica.original.subreddit_data import SubredditData
 from examinlexica.original.historical_data import HistoricalData
 from examinlexica.constants import (
@@ -38,12 +43,8 @@ from examinlexica.constants import (
     ACCEPTABLE_OPTIONS
     )
 
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-
-def cluster_data(data, algorithm, args, kwds, name, result_folder):
+def cluster_data(data, algorithm, args, kwds, name, result_folder, rank=None,
+                 plot=False, seed=0):
     '''
     Cluster the given data and save the results in a npy-file
 
@@ -55,32 +56,90 @@ def cluster_data(data, algorithm, args, kwds, name, result_folder):
         name: name of the file that will be used to save the result
         result_folder: path to a folder, in which the results are stored (if folder
             does not exists it will be created by the function)
+        rank: number of leading SVD components to cluster, None for all
+        plot: draw the clusters into the (cached) t-SNE embedding of the data
+        seed: random state of t-SNE
+    '''
+    projection = project(data, rank)
+    labels = algorithm(*args, **kwds).fit_predict(projection)
+    save_labels(data, labels, name, result_folder, plot, seed)
+
+def save_labels(data, labels, name, result_folder, plot=False, seed=0):
+    '''
+    Save the labels of a clustering in a npy-file and optionally plot them
+
+    Arguments:
+        data: data that was clustered
+        labels: cluster of every lexicon
+        name: name of the file that will be used to save the result
+        result_folder: path to a folder, in which the results are stored
+        plot: draw the clusters into the (cached) t-SNE embedding of the data
+        seed: random state of t-SNE
     '''
     results = result_folder + '_results'
-    u, s, _ = np.linalg.svd(data, full_matrices=False)
     if not os.path.exists(results):
         os.makedirs(results)
-    d = TSNE(n_components=3).fit_transform(data)
-    vis_x = d[:, 0]
-    vis_y = d[:, 1]
-    vis_z = d[:, 2]
-    fig = plt.figure(figsize=(12, 10))
-    ax = fig.add_subplot(111, projection='3d')
-    labels = algorithm(*args, **kwds).fit_predict(u*s)
-    colors = [plt.cm.plasma(float(i)/max(labels)) for i in labels]
-    classes = list(set(labels))
-    if not os.path.exists('graphs'):
-        os.makedirs('graphs')
-    for i, u in enumerate(classes):
-        v_x = [vis_x[j] for j in range(len(vis_x)) if labels[j] == u]
-        v_y = [vis_y[j] for j in range(len(vis_y)) if labels[j] == u]
-        v_z = [vis_z[j] for j in range(len(vis_z)) if labels[j] == u]
-        ax.scatter(v_x, v_y, v_z, c=colors[i], s=150,label=str(u))
-    plt.legend()
-    plt.savefig('graphs/' + name + '.png', bbox_inches='tight')
     np.save(results + '/' + name + '_labels.npy', labels)
+    if plot:
+        plot_clusters(embed(data, seed), labels, name)
 
-def start_cluster(data, result_path, matrix, number_of_clusters, algorithm):
+def get_algorithms(number_of_clusters, algorithm, kmeans='cold'):
+    '''
+    Return all clustering algorithms to apply and their parameters.
+    Kmeans and aggl. clustering are skipped if no number of clusters is given.
+
+    Arguments:
+        number_of_clusters: number of clusters (or list of numbers) for Kmeans
+            and aggl. clustering
+        algorithm: algorithm to use for clustering or all
+        kmeans: cold (Kmeans), minibatch (mini batch Kmeans) or warm; warm
+            started Kmeans depends on the previous number of clusters and is
+            thus not part of the list (see start_cluster)
+    Returns:
+        list of (name used in the result files, algorithm, key word arguments)
+    '''
+    if algorithm == 'all':
+        algorithm = ['KMEANS', 'HDBSCAN', 'AGGL']
+    else:
+        algorithm = [algorithm.upper()]
+    if isinstance(number_of_clusters, int):
+        number_of_clusters = [number_of_clusters]
+    clusters = [k for k in number_of_clusters if k]
+    algorithms = []
+    if 'KMEANS' in algorithm and kmeans != 'warm':
+        for k in clusters:
+            algorithms.append((
+                'Kmeans_' + str(k),
+                cluster.MiniBatchKMeans if kmeans == 'minibatch' else cluster.KMeans,
+                {'n_clusters':k}
+            ))
+    if 'AGGL' in algorithm:
+        for k in clusters:
+            algorithms.append((
+                'aggl_' + str(k),
+                cluster.AgglomerativeClustering,
+                {
+                    'n_clusters':k,
+                    'linkage':'average',
+                    'metric':'euclidean'
+                }
+            ))
+    if 'HDBSCAN' in algorithm:
+        algorithms.append((
+            'HDBSCAN',
+            hdbscan.HDBSCAN,
+            {
+                'min_cluster_size':2,
+                'min_samples':1,
+                'cluster_selection_method':'leaf',
+                'metric':'euclidean'
+            }
+        ))
+    return algorithms
+
+def start_cluster(data, result_path, matrix, number_of_clusters, algorithm, rank=None,
+                  plot=False, seed=0, kmeans='cold', last_number_of_clusters=None,
+                  metric='euclidean'):
     '''
     Function to start clustering, results are saved in a seperate folder.
     All clustering algorithms are applied to the given data.
@@ -96,52 +155,56 @@ def start_cluster(data, result_path, matrix, number_of_clusters, algorithm):
             clustering
         algorithm:
             algorithm to use for clustering
+        rank:
+            number of leading SVD components to cluster, None for all
+        plot:
+            draw the clusters into the t-SNE embedding, which is computed once
+            per view and seed
+        seed:
+            random state of t-SNE
+        kmeans:
+            cold (Kmeans from scratch), warm (Kmeans started at the centroids
+            of the previous number of clusters) or minibatch (mini batch Kmeans)
+        last_number_of_clusters:
+            cluster with every number from number_of_clusters up to this one
+        metric:
+            distance between the lexica used by aggl. clustering and HDBSCAN
+            (euclidean or cosine), both use the shared pairwise distances
     '''
-    data = data[matrix][:]
-    zero_rate = 0
-    lines = 0
+    data = data[matrix]
     name = matrix + '_'
-    if algorithm == 'all':
-        algorithm = ['KMEANS', 'HDBSCAN', 'AGGL']
-    else:
-        algorithm = [algorithm.upper()]
-    if number_of_clusters:
-        if 'KMEANS' in algorithm:
-            cluster_data(
+    clusters = cluster_numbers(number_of_clusters, last_number_of_clusters)
+    if kmeans == 'warm' and algorithm.upper() in ['ALL', 'KMEANS']:
+        projection = project(data, rank)
+        for k, labels in kmeans_labels(projection, clusters, 'warm'):
+            save_labels(data, labels, name + 'Kmeans_' + str(k), result_path, plot, seed)
+    if algorithm.upper() in ['ALL', 'AGGL']:
+        # one average linkage tree per view, cut for every number of clusters
+        for k, labels in aggl_labels(data, clusters, rank, metric):
+            save_labels(data, labels, name + 'aggl_' + str(k), result_path, plot, seed)
+    for label, clusterer, kwds in get_algorithms(clusters, algorithm, kmeans):
+        if clusterer is cluster.AgglomerativeClustering:
+            continue
+        if clusterer is hdbscan.HDBSCAN:
+            # extracted from the cached single linkage tree of the view
+            labels = hdbscan_labels(
                 data,
-                cluster.KMeans,
-                (),
-                {'n_clusters':number_of_clusters},
-                name + "Kmeans_"+str(number_of_clusters),
-                result_path
+                kwds['min_samples'],
+                kwds['min_cluster_size'],
+                kwds['cluster_selection_method'],
+                rank,
+                metric
             )
-        if 'AGGL' in algorithm:
-            cluster_data(
-                data,
-                cluster.AgglomerativeClustering,
-                (),
-                {
-                    'n_clusters':number_of_clusters,
-                    'linkage':'average',
-                    'affinity':'euclidean'
-                },
-                name + 'aggl_' + str(number_of_clusters),
-                result_path
-            )
-    if 'HDBSCAN' in algorithm:
-        cluster_data(
-            data,
-            hdbscan.HDBSCAN,
-            (),
-            {
-                'min_cluster_size':2,
-                'min_samples':1,
-                'cluster_selection_method':'leaf',
-                'metric':'euclidean'
-            },
-            name + 'HDBSCAN',
-            result_path
-        )
+            save_labels(data, labels, name + label, result_path, plot, seed)
+            continue
+        cluster_data(data, clusterer, (), kwds, name + label, result_path, rank, plot, seed)
+
+def cluster_numbers(number_of_clusters, last_number_of_clusters=None):
+    ''' Return all numbers of clusters from the first up to the last one '''
+    if not number_of_clusters:
+        return []
+    last = max(last_number_of_clusters or number_of_clusters, number_of_clusters)
+    return list(range(number_of_clusters, last + 1))
 
 
 def clarguments_checks(matrix, clusters):
@@ -188,18 +251,80 @@ if __name__ == '__main__':
         choices=ACCEPTABLE_OPTIONS,
         default=None
     )
+    parser.add_argument(
+        '-s',
+        '--sparse',
+        action='store_true',
+        help='store the feature matrices as sparse matrices'
+    )
+    parser.add_argument(
+        '--shared',
+        action='store_true',
+        help='map the feature matrices from files shared by parallel runs'
+    )
+    parser.add_argument(
+        '--dtype',
+        default='float64',
+        choices=['float64', 'float32', 'float16'],
+        help='data type of the feature matrices (float16 only for storage)'
+    )
+    parser.add_argument(
+        '--rank',
+        default=None,
+        help='number of leading SVD components to cluster (randomized SVD)',
+        type=int
+    )
+    parser.add_argument(
+        '-p',
+        '--plot',
+        action='store_true',
+        help='draw the clusters into a (cached) t-SNE embedding'
+    )
+    parser.add_argument(
+        '--seed',
+        default=0,
+        help='random state of t-SNE',
+        type=int
+    )
+    parser.add_argument(
+        '-k',
+        '--kmeans',
+        default='cold',
+        choices=KMEANS_MODES,
+        help='Kmeans from scratch, warm started from the previous number of '
+             'clusters or mini batch Kmeans'
+    )
+    parser.add_argument(
+        '-c_end',
+        '--clusters_end',
+        default=None,
+        help='cluster with every number of clusters from --clusters up to this one',
+        type=int
+    )
+    parser.add_argument(
+        '--metric',
+        default='euclidean',
+        choices=METRICS,
+        help='distance between the lexica for aggl. clustering and HDBSCAN'
+    )
     args = vars(parser.parse_args())
     if not clarguments_checks(args['matrix'], args['clusters']):
         sys.exit()
     if args['data'] in HISTORICAL_OPTIONS.keys():
         path = HISTORICAL_OPTIONS[args['data']]
-        data = HistoricalData(path)
+        data = HistoricalData(path, args['sparse'], args['shared'], args['dtype'])
     else:
-        data = SubredditData(PATH_CLUSTERS)
+        data = SubredditData(PATH_CLUSTERS, args['sparse'], args['shared'], args['dtype'])
     start_cluster(
         data.sentiments,
         args['results'],
         args['matrix'],
         args['clusters'],
-        args['algorithm']
+        args['algorithm'],
+        args['rank'],
+        args['plot'],
+        args['seed'],
+        args['kmeans'],
+        args['clusters_end'],
+        args['metric']
     )
@@ -8,8 +8,10 @@ corresponding graph.
 from random import randint
 
 import numpy as np
-import sklearn.cluster as cluster
 import matplotlib
+from examinlexica.reduction import project
+from examinlexica.sweep import run_sweep
+from examinlexica.kmeans_sweep import kmeans_models, cold_kmeans
 from examinlexica.original.subreddit_data import SubredditData
 from examinlexica.original.historical_data import HistoricalData
 from examinlexica.constants import (
@@ -20,8 +22,19 @@ from examinlexica.constants import (
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 
+# number of leading SVD components to cluster, None for all
+RANK = None
+# numbers of clusters of the sweep
+CLUSTERS = range(2, 200)
+# number of processes (None: one per core) and BLAS threads per process
+# (None: cores split evenly between the processes)
+WORKERS = None
+THREADS = None
+# Kmeans from scratch (cold), warm started from the previous number of clusters
+# (warm) or mini batch Kmeans (minibatch)
+KMEANS = 'cold'
 
-def cluster_data(data, algorithm, args, kwds):
+def cluster_data(data, algorithm, args, kwds, rank=None):
     '''
     Cluster the given data and calculate inner or inter cluster distance
 
@@ -30,10 +43,16 @@ def cluster_data(data, algorithm, args, kwds):
         algorithm: the algorithm used for clustering (method call!)
         args: all arguments to be passed to the algorithm method
         kwds: all  arguments to be passed to the algorithm method via key words
+        rank: number of leading SVD components to cluster, None for all
     '''
-    u, s, _ = np.linalg.svd(data, full_matrices=False)
-    data_unclustered = u*s
-    clusterer = algorithm(*args, **kwds).fit(data_unclustered)
+    return centroid_distance(project(data, rank), algorithm, args, kwds)
+
+def centroid_distance(data_unclustered, algorithm, args, kwds):
+    ''' Cluster the projected data and calculate inner or inter cluster distance '''
+    return fitted_distance(data_unclustered, algorithm(*args, **kwds).fit(data_unclustered))
+
+def fitted_distance(data_unclustered, clusterer):
+    ''' Calculate inner or inter cluster distance of a fitted Kmeans model '''
     centroids = clusterer.cluster_centers_
     labels = clusterer.labels_
     distances = []
@@ -66,36 +85,71 @@ def get_cluster_distances(centroids):
         distances.append(np.mean(dist))
     return np.mean(distances)
 
-def all_distances(data):
+def kmeans_distance(projection, number_of_clusters, mode='cold'):
+    ''' Return distance of (mini batch) Kmeans using number_of_clusters (job of a sweep) '''
+    return fitted_distance(projection, cold_kmeans(number_of_clusters, mode).fit(projection))
+
+def warm_distances(projection, clusters):
+    ''' Return distances of warm started Kmeans for all numbers of clusters (job of a sweep) '''
+    return [
+        fitted_distance(projection, model)
+        for _, model in kmeans_models(projection, clusters, 'warm')
+    ]
+
+def sweep_distances(projections, clusters=CLUSTERS, workers=None, threads=None, mode='cold'):
+    '''
+    Compute the distances of Kmeans for every view and number of clusters in
+    parallel
+
+    Arguments:
+        projections: dictionary of form view:projection
+        clusters: numbers of clusters
+        workers: number of processes, None for one per core
+        threads: BLAS threads per process, None to split the cores evenly
+        mode: cold, warm or minibatch Kmeans; a warm started sweep depends on
+            the previous number of clusters, thus each view is one job
+    Yields:
+        view, number of clusters and distance, for every view in ascending
+        order of the number of clusters
+    '''
+    clusters = sorted(clusters)
+    if mode == 'warm':
+        jobs = [(view, (clusters,)) for view in projections]
+        for view, _, distances in run_sweep(projections, jobs, warm_distances, workers, threads):
+            for i, distance in zip(clusters, distances):
+                yield view, i, distance
+        return
+    jobs = [(view, (i, mode)) for i in clusters for view in projections]
+    for view, (i, _), distance in run_sweep(projections, jobs, kmeans_distance, workers, threads):
+        yield view, i, distance
+
+def all_distances(data, rank=None, workers=None, threads=None, mode='cold'):
     ''' Return all distances '''
-    distances = []
-    for i in range(2, 200):
-        distances.append(
-            cluster_data(
-                data,
-                cluster.KMeans,
-                (),
-                {'n_clusters':i},
-            )
-        )
-    return distances
+    projections = {'data': project(data, rank)}
+    return [
+        distance for _, _, distance
+        in sweep_distances(projections, CLUSTERS, workers, threads, mode)
+    ]
 
 
 if __name__ == '__main__':
     data = SubredditData(PATH_CLUSTERS)
-    distances_min = all_distances(data.sentiments['minimum'])
-    distances_max = all_distances(data.sentiments['maximum'])
-    distances_norm = all_distances(data.sentiments['normal'])
-    distances_all = all_distances(data.sentiments['all'])
-    distances = [distances_min, distances_max, distances_norm, distances_all]
+    matrix = ['minimum', 'maximum', 'normal', 'all']
+    projections = {}
+    for view in matrix:
+        projections[view] = project(data.sentiments[view], RANK)
+        data.sentiments.release(view)
+    distances = {view: [] for view in matrix}
+    for view, number_of_clusters, distance in sweep_distances(
+            projections, CLUSTERS, WORKERS, THREADS, KMEANS):
+        distances[view].append(distance)
     plt.figure(figsize=(22, 20), dpi=120)
     subplots = [221, 222, 223, 224]
-    matrix = ['minimum', 'maximum', 'normal', 'all']
     for plot in range(len(subplots)):
         plt.subplot(subplots[plot])
-        plt.plot([i for i in range(2, 200)], distances[plot])
+        plt.plot(list(CLUSTERS), distances[matrix[plot]])
         plt.title(matrix[plot] + ' values')
         plt.grid(True)
         plt.xlabel('Number of Clusters')
         plt.ylabel('inner centroid distance')
-plt.savefig('distances.png')
+    plt.savefig('distances.png')
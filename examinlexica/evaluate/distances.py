@@ -6,6 +6,7 @@ from random import randint
 import numpy as np
 import sklearn.cluster as cluster
 import matplotlib
+from examinlexica.reduction import project
 from examinlexica.original.subreddit_data import SubredditData
 from examinlexica.original.historical_data import HistoricalData
 from examinlexica.constants import (
@@ -17,7 +18,7 @@ matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 
 
-def cluster_data(data, algorithm, args, kwds):
+def cluster_data(data, algorithm, args, kwds, rank=None):
     '''
     Cluster the given data and save the results in a npy-file
 
@@ -26,12 +27,12 @@ def cluster_data(data, algorithm, args, kwds):
         algorithm: the algorithm used for clustering (method call!)
         args: all arguments to be passed to the algorithm method
         kwds: all  arguments to be passed to the algorithm method via key words
+        rank: number of leading SVD components to cluster, None for all
         name: name of the file that will be used to save the result
         result_folder: path to a folder, in which the results are stored (if folder
             does not exists it will be created by the function)
     '''
-    u, s, _ = np.linalg.svd(data, full_matrices=False)
-    data_unclustered = u*s
+    data_unclustered = project(data, rank)
     clusterer = algorithm(*args, **kwds).fit(data_unclustered)
     centroids = clusterer.cluster_centers_
     labels = clusterer.labels_
@@ -61,7 +62,7 @@ def get_cluster_distances(centroids):
         distances.append(np.mean(dist))
     return np.mean(distances)
 
-def all_distances(data):
+def all_distances(data, rank=None):
     ''' Return all distances '''
     inner_distances = []
     inter_distances = []
@@ -71,6 +72,7 @@ def all_distances(data):
                         cluster.KMeans,
                         (),
                         {'n_clusters':i},
+                        rank
                     )
 
         inner_distances.append(distance[0])
@@ -0,0 +1,109 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Report the effect of a smaller data type of the feature matrices on the
+clustering results.
+
+For every view the data is clustered once using float64 and once using each of
+the compared data types. The script prints the memory of the view, the largest
+change of a distance between two lexica after the projection and the adjusted
+rand index between the labels of both runs (1.0: identical clusters).
+'''
+
+import argparse
+
+import numpy as np
+import sklearn.cluster as cluster
+from sklearn import metrics
+from scipy.spatial.distance import pdist
+
+from examinlexica.reduction import project
+from examinlexica.original.subreddit_data import SubredditData
+from examinlexica.original.historical_data import HistoricalData
+from examinlexica.constants import (
+    PATH_CLUSTERS,
+    HISTORICAL_OPTIONS,
+    ACCEPTABLE_OPTIONS
+    )
+
+def load_data(data, dtype):
+    ''' Return data set (subreddits, adjectives or frequencies) using dtype '''
+    if data in HISTORICAL_OPTIONS.keys():
+        return HistoricalData(HISTORICAL_OPTIONS[data], dtype=dtype)
+    return SubredditData(PATH_CLUSTERS, dtype=dtype)
+
+def cluster_labels(projection, number_of_clusters):
+    ''' Return labels of Kmeans and agglomerative clustering '''
+    kmeans = cluster.KMeans(n_clusters=number_of_clusters, n_init=10, random_state=0)
+    aggl = cluster.AgglomerativeClustering(n_clusters=number_of_clusters, linkage='average')
+    return kmeans.fit_predict(projection), aggl.fit_predict(projection)
+
+def compare_dtypes(data, dtypes, number_of_clusters, views=ACCEPTABLE_OPTIONS):
+    '''
+    Compare clustering results of float64 with those of smaller data types
+
+    Arguments:
+        data: name of the data set
+        dtypes: list of data types to compare with float64
+        number_of_clusters: number of clusters of Kmeans and aggl. clustering
+        views: views to compare
+    Returns:
+        list of rows: view, dtype, megabytes of the view, maximal distance
+        error, adjusted rand index of Kmeans and aggl. clustering
+    '''
+    reference = load_data(data, np.float64)
+    compared = {dtype: load_data(data, dtype) for dtype in dtypes}
+    rows = []
+    for view in views:
+        projection = project(reference.sentiments[view])
+        reference_distances = pdist(projection)
+        reference_labels = cluster_labels(projection, number_of_clusters)
+        rows.append([view, 'float64', reference.sentiments[view].values.nbytes / 2**20, 0, 1, 1])
+        reference.sentiments.release(view)
+        for dtype, data_set in compared.items():
+            projection = project(data_set.sentiments[view])
+            distances = pdist(projection.astype(np.float64))
+            labels = cluster_labels(projection, number_of_clusters)
+            rows.append([
+                view,
+                dtype,
+                data_set.sentiments[view].values.nbytes / 2**20,
+                np.max(np.abs(distances - reference_distances)),
+                metrics.adjusted_rand_score(reference_labels[0], labels[0]),
+                metrics.adjusted_rand_score(reference_labels[1], labels[1])
+            ])
+            data_set.sentiments.release(view)
+    return rows
+
+def pretty_print(rows):
+    ''' Return an easy to read table '''
+    result = 'view\tdtype\tMB\tmax. distance error\tARI Kmeans\tARI aggl.'
+    for row in rows:
+        result += '\n%s\t%s\t%.1f\t%.2e\t%.4f\t%.4f' % tuple(row)
+    return result
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        'data',
+        help='data to be clustered',
+        choices=['subreddits', 'adjectives', 'frequencies'],
+    )
+    parser.add_argument(
+        '-c',
+        '--clusters',
+        default=10,
+        help='number of clusters used for Kmeans and aggl. clustering',
+        type=int
+    )
+    parser.add_argument(
+        '-d',
+        '--dtypes',
+        nargs='+',
+        default=['float32', 'float16'],
+        choices=['float32', 'float16'],
+        help='data types to compare with float64'
+    )
+    args = vars(parser.parse_args())
+    print(pretty_print(compare_dtypes(args['data'], args['dtypes'], args['clusters'])))
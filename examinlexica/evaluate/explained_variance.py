@@ -0,0 +1,86 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Report how much of the variance of a view is kept by the leading SVD components
+and how long their randomized decomposition takes.
+
+Use this script to choose the rank (--rank of cluster.py and get_clusters.py):
+for every rank it prints the share of the variance kept and the time of the
+randomized SVD, compared to the exact decomposition of the whole view.
+'''
+
+import time
+import argparse
+
+from examinlexica.reduction import decompose, explained_variance
+from examinlexica.original.subreddit_data import SubredditData
+from examinlexica.original.historical_data import HistoricalData
+from examinlexica.constants import (
+    PATH_CLUSTERS,
+    HISTORICAL_OPTIONS,
+    ACCEPTABLE_OPTIONS
+    )
+
+def load_data(data, sparse):
+    ''' Return data set (subreddits, adjectives or frequencies) '''
+    if data in HISTORICAL_OPTIONS.keys():
+        return HistoricalData(HISTORICAL_OPTIONS[data], sparse)
+    return SubredditData(PATH_CLUSTERS, sparse)
+
+def variance_report(view, ranks):
+    '''
+    Decompose a view exactly and with each rank
+
+    Arguments:
+        view: feature matrix of one view
+        ranks: list of ranks
+    Returns:
+        list of rows: rank, share of the variance, seconds of the decomposition
+    '''
+    start = time.time()
+    projection = decompose(view.values)
+    rows = [['full', explained_variance(view, projection)[-1], time.time() - start]]
+    for rank in sorted(ranks):
+        start = time.time()
+        projection = decompose(view.values, rank)
+        seconds = time.time() - start
+        rows.append([rank, explained_variance(view, projection)[-1], seconds])
+    return rows
+
+def pretty_print(rows):
+    ''' Return an easy to read table '''
+    result = 'rank\texplained variance\tseconds'
+    for row in rows:
+        result += '\n%s\t%.4f\t%.2f' % tuple(row)
+    return result
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        'data',
+        help='data to be clustered',
+        choices=['subreddits', 'adjectives', 'frequencies'],
+    )
+    parser.add_argument(
+        'matrix',
+        help='create feature matrix using normal, minimal, maximal or all three values',
+        choices=ACCEPTABLE_OPTIONS,
+    )
+    parser.add_argument(
+        '-r',
+        '--ranks',
+        nargs='+',
+        default=[2, 5, 10, 20, 50, 100],
+        help='ranks of the randomized SVD',
+        type=int
+    )
+    parser.add_argument(
+        '-s',
+        '--sparse',
+        action='store_true',
+        help='store the feature matrices as sparse matrices'
+    )
+    args = vars(parser.parse_args())
+    data_set = load_data(args['data'], args['sparse'])
+    print(pretty_print(variance_report(data_set.sentiments[args['matrix']], args['ranks'])))
@@ -0,0 +1,101 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Benchmark the Kmeans modes of a sweep over the number of clusters.
+
+The view is clustered with every number of clusters using Kmeans from scratch
+(cold, the baseline), warm started Kmeans and mini batch Kmeans. For every
+number of clusters and mode the script prints the time of the fit, the inertia
+and the drift of the inertia compared to the baseline (0.01: 1% higher).
+'''
+
+import time
+import argparse
+
+from examinlexica.reduction import project
+from examinlexica.kmeans_sweep import kmeans_models, KMEANS_MODES
+from examinlexica.original.subreddit_data import SubredditData
+from examinlexica.original.historical_data import HistoricalData
+from examinlexica.constants import (
+    PATH_CLUSTERS,
+    HISTORICAL_OPTIONS,
+    ACCEPTABLE_OPTIONS
+    )
+
+def load_data(data):
+    ''' Return data set (subreddits, adjectives or frequencies) '''
+    if data in HISTORICAL_OPTIONS.keys():
+        return HistoricalData(HISTORICAL_OPTIONS[data])
+    return SubredditData(PATH_CLUSTERS)
+
+def benchmark(projection, clusters, modes=KMEANS_MODES):
+    '''
+    Time every Kmeans mode for every number of clusters
+
+    Arguments:
+        projection: projected view
+        clusters: numbers of clusters
+        modes: Kmeans modes to compare with the cold start
+    Returns:
+        list of rows: number of clusters, mode, seconds, inertia, drift
+    '''
+    results = {}
+    for mode in ['cold'] + [mode for mode in modes if mode != 'cold']:
+        start = time.time()
+        for number_of_clusters, model in kmeans_models(projection, clusters, mode):
+            results[(number_of_clusters, mode)] = [time.time() - start, model.inertia_]
+            start = time.time()
+    rows = []
+    for (number_of_clusters, mode), (seconds, inertia) in sorted(results.items()):
+        baseline = results[(number_of_clusters, 'cold')][1]
+        rows.append([number_of_clusters, mode, seconds, inertia, inertia / baseline - 1])
+    return rows
+
+def pretty_print(rows):
+    ''' Return an easy to read table and the total time of each mode '''
+    result = 'clusters\tmode\tseconds\tinertia\tdrift'
+    totals = {}
+    for row in rows:
+        result += '\n%i\t%s\t%.3f\t%.2f\t%+.4f' % tuple(row)
+        totals[row[1]] = totals.get(row[1], 0) + row[2]
+    for mode, seconds in totals.items():
+        result += '\ntotal\t%s\t%.3f' % (mode, seconds)
+    return result
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        'data',
+        help='data to be clustered',
+        choices=['subreddits', 'adjectives', 'frequencies'],
+    )
+    parser.add_argument(
+        'matrix',
+        help='create feature matrix using normal, minimal, maximal or all three values',
+        choices=ACCEPTABLE_OPTIONS,
+    )
+    parser.add_argument(
+        '-c',
+        '--clusters',
+        default=2,
+        help='first number of clusters',
+        type=int
+    )
+    parser.add_argument(
+        '-c_end',
+        '--clusters_end',
+        default=50,
+        help='last number of clusters',
+        type=int
+    )
+    parser.add_argument(
+        '--rank',
+        default=None,
+        help='number of leading SVD components to cluster',
+        type=int
+    )
+    args = vars(parser.parse_args())
+    data_set = load_data(args['data'])
+    view = project(data_set.sentiments[args['matrix']], args['rank'])
+    print(pretty_print(benchmark(view, range(args['clusters'], args['clusters_end'] + 1))))
@@ -11,7 +11,9 @@ import sys
 import argparse
 import shutil
 
-from examinlexica.cluster import start_cluster
+from examinlexica.cluster import start_cluster, cluster_numbers
+from examinlexica.kmeans_sweep import KMEANS_MODES
+from examinlexica.pairwise import METRICS
 from examinlexica.original.subreddit_data import SubredditData
 from examinlexica.original.historical_data import HistoricalData
 from examinlexica.clusteredData.clustered_data import ClusteredData
@@ -26,7 +28,10 @@ from examinlexica.evaluate.evaluate import (
     evaluate_kmeans
 )
 
-def cluster_process(data, result_folder, matrix, number_of_clusters, algorithm):
+def cluster_process(data, result_folder, matrix, number_of_clusters, algorithm,
+                    sparse=False, shared=False, dtype='float64', rank=None,
+                    plot=False, kmeans='cold', last_number_of_clusters=None,
+                    metric='euclidean'):
     '''
     Start clustering process.
 
@@ -36,6 +41,16 @@ def cluster_process(data, result_folder, matrix, number_of_clusters, algorithm):
         matrix: whether to use unchanged, minimal, maximal or all three values
         number_of_clusters: number of clusters to use for Kmeans and aggl. Clust.
         algorithm: algorithm to use for clustering
+        sparse: store the feature matrices as sparse matrices
+        shared: map the feature matrices from files shared by parallel runs
+        dtype: data type of the feature matrices
+        rank: number of leading SVD components to cluster, None for all
+        plot: draw the clusters into a (cached) t-SNE embedding
+        kmeans: cold, warm (started at the previous number of clusters) or
+            minibatch Kmeans
+        last_number_of_clusters: cluster with every number of clusters from
+            number_of_clusters up to this one
+        metric: distance between the lexica for aggl. clustering and HDBSCAN
     Returns:
         Easily readable string of clusters. The result is also written in a file
         in the result_folder named 'matrix_number_of_clusters.txt.
@@ -43,12 +58,23 @@ def cluster_process(data, result_folder, matrix, number_of_clusters, algorithm):
     hist = False
     if data in HISTORICAL_OPTIONS.keys():
         path = HISTORICAL_OPTIONS[data]
-        data = HistoricalData(path)
+        data = HistoricalData(path, sparse, shared, dtype)
         hist = True
     else:
-        data = SubredditData(PATH_CLUSTERS)
+        data = SubredditData(PATH_CLUSTERS, sparse, shared, dtype)
         path = PATH_CLUSTERS
-    start_cluster(data.sentiments, 'temp', matrix, number_of_clusters, algorithm)
+    start_cluster(
+        data.sentiments,
+        'temp',
+        matrix,
+        number_of_clusters,
+        algorithm,
+        rank,
+        plot,
+        kmeans=kmeans,
+        last_number_of_clusters=last_number_of_clusters,
+        metric=metric
+    )
     if not os.path.exists(result_folder):
         os.makedirs(result_folder)
     if hist:
@@ -56,10 +82,11 @@ def cluster_process(data, result_folder, matrix, number_of_clusters, algorithm):
     else:
         clusters = ClusteredData(PATH_CLUSTERS, 'temp_results')
     results = ""
+    clusters_range = cluster_numbers(number_of_clusters, last_number_of_clusters)
     if algorithm == 'all':
-        if number_of_clusters:
-            results += evaluate_kmeans(clusters, number_of_clusters, matrix)
-            results += evaluate_agg(clusters, number_of_clusters, matrix)
+        for k in clusters_range:
+            results += evaluate_kmeans(clusters, k, matrix)
+            results += evaluate_agg(clusters, k, matrix)
         results += evaluate_hdbscan(clusters, matrix)
     else:
         algorithms = {
@@ -72,10 +99,14 @@ def cluster_process(data, result_folder, matrix, number_of_clusters, algorithm):
             sys.exit()
         evaluate_function = algorithms[algorithm]
         if algorithm == 'HDBSCAN':
-            results += evaluate_function(clusters, args['matrix'])
+            results += evaluate_function(clusters, matrix)
         else:
-            results += evaluate_function(clusters, args['clusters'], args['matrix'])
-    filename = result_folder + '/' + algorithm + '_' + matrix + '_' + str(number_of_clusters) + '.txt'
+            for k in clusters_range:
+                results += evaluate_function(clusters, k, matrix)
+    name = str(number_of_clusters)
+    if len(clusters_range) > 1:
+        name += '-' + str(clusters_range[-1])
+    filename = result_folder + '/' + algorithm + '_' + matrix + '_' + name + '.txt'
     with open(filename, 'w') as f:
         f.write(results)
     shutil.rmtree('temp_results')
@@ -114,6 +145,56 @@ if __name__ == '__main__':
         default='all',
         choices=['Aggl', 'Kmeans', 'HDBSCAN'],
     )
+    parser.add_argument(
+        '-s',
+        '--sparse',
+        action='store_true',
+        help='store the feature matrices as sparse matrices'
+    )
+    parser.add_argument(
+        '--shared',
+        action='store_true',
+        help='map the feature matrices from files shared by parallel runs'
+    )
+    parser.add_argument(
+        '--dtype',
+        default='float64',
+        choices=['float64', 'float32', 'float16'],
+        help='data type of the feature matrices (float16 only for storage)'
+    )
+    parser.add_argument(
+        '--rank',
+        default=None,
+        help='number of leading SVD components to cluster (randomized SVD)',
+        type=int
+    )
+    parser.add_argument(
+        '-p',
+        '--plot',
+        action='store_true',
+        help='draw the clusters into a (cached) t-SNE embedding'
+    )
+    parser.add_argument(
+        '-k',
+        '--kmeans',
+        default='cold',
+        choices=KMEANS_MODES,
+        help='Kmeans from scratch, warm started from the previous number of '
+             'clusters or mini batch Kmeans'
+    )
+    parser.add_argument(
+        '-c_end',
+        '--clusters_end',
+        default=None,
+        help='cluster with every number of clusters from --clusters up to this one',
+        type=int
+    )
+    parser.add_argument(
+        '--metric',
+        default='euclidean',
+        choices=METRICS,
+        help='distance between the lexica for aggl. clustering and HDBSCAN'
+    )
     args = vars(parser.parse_args())
     print(
         cluster_process(
@@ -121,6 +202,14 @@ if __name__ == '__main__':
             args['results'],
             args['matrix'],
             args['clusters'],
-            args['algorithm']
+            args['algorithm'],
+            args['sparse'],
+            args['shared'],
+            args['dtype'],
+            args['rank'],
+            args['plot'],
+            args['kmeans'],
+            args['clusters_end'],
+            args['metric']
         )
     )
@@ -0,0 +1,233 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+HDBSCAN for a grid of parameters using one single linkage tree.
+
+Only min_samples changes the mutual reachability distances and thus the minimum
+spanning tree and the single linkage tree of HDBSCAN. min_cluster_size and the
+cluster selection method (eom or leaf) only change how the flat clusters are
+extracted from the tree. The tree and the minimum spanning tree are thus
+computed once per view and min_samples and cached next to the projection of the
+view. Extracting the clusters for other parameters takes milliseconds. HDBSCAN
+runs on the shared pairwise distances of pairwise.py.
+
+The labels of the whole grid are written to 'view_hdbscan.npz'
+(key: min_samples_min_cluster_size_method) in the results folder.
+'''
+
+import os
+import argparse
+import numpy as np
+from scipy.spatial.distance import squareform
+from hdbscan.hdbscan_ import hdbscan
+# hdbscan has no public way to extract clusters out of a given tree. This private
+# function is why setup.py pins the tested version of hdbscan.
+from hdbscan.hdbscan_ import _tree_to_labels
+
+from examinlexica.pairwise import distance_matrix, METRICS
+from examinlexica.reduction import (
+    projection_name,
+    load_projection,
+    save_projection,
+    remember_projection,
+    PROJECTIONS
+    )
+from examinlexica.original.subreddit_data import SubredditData
+from examinlexica.original.historical_data import HistoricalData
+from examinlexica.constants import (
+    PATH_CLUSTERS,
+    HISTORICAL_OPTIONS,
+    ACCEPTABLE_OPTIONS
+    )
+
+SELECTION_METHODS = ['eom', 'leaf']
+
+def tree_names(filename, rank, min_samples, metric):
+    ''' Return filenames of the single linkage tree and the minimum spanning tree '''
+    folder, name = os.path.split(projection_name(filename, rank))
+    return [
+        os.path.join(folder, 'hdbscan%i-%s_%s_%s' % (min_samples, metric, tree, name))
+        for tree in ['linkage', 'mst']
+    ]
+
+def fit_trees(distances, min_samples):
+    ''' Return single linkage tree and minimum spanning tree of HDBSCAN '''
+    # the minimum_spanning_tree_ of the HDBSCAN class is only available for raw
+    # data, the module level function also returns it for precomputed distances
+    results = hdbscan(
+        distances,
+        min_cluster_size=2,
+        min_samples=min_samples,
+        metric='precomputed',
+        gen_min_span_tree=True
+    )
+    return results[4], results[5]
+
+def square_distances(data, metric, rank, distances=None):
+    ''' Return square distance matrix out of the given or the cached distances '''
+    if distances is None:
+        return distance_matrix(data, metric, rank)
+    return squareform(distances)
+
+def hdbscan_trees(data, min_samples=1, rank=None, metric='euclidean', distances=None):
+    '''
+    Return single linkage tree and minimum spanning tree of a view
+
+    If data is a view with a fingerprint (SentimentMatrix), the trees are looked
+    up in memory and on disk first and only computed if they are not cached yet.
+
+    Arguments:
+        data: feature matrix
+        min_samples: min_samples of HDBSCAN
+        rank: number of leading SVD components to cluster, None for all
+        metric: euclidean or cosine
+        distances: condensed distances of the lexica at this rank and metric,
+            computed (see pairwise.py) if None
+    Returns:
+        single linkage tree, minimum spanning tree (both as numpy arrays)
+    '''
+    key = getattr(data, 'fingerprint', None)
+    filename = getattr(data, 'projection_file', None)
+    if key is None:
+        return fit_trees(square_distances(data, metric, rank, distances), min_samples)
+    key = (key, 'hdbscan', min_samples, metric, rank)
+    if key in PROJECTIONS:
+        PROJECTIONS.move_to_end(key)
+        return PROJECTIONS[key]
+    filenames = tree_names(filename, rank, min_samples, metric) if filename else None
+    trees = [load_projection(name) for name in filenames] if filenames else [None]
+    if any(tree is None or len(tree) != data.shape[0] - 1 for tree in trees):
+        trees = fit_trees(square_distances(data, metric, rank, distances), min_samples)
+        if filenames:
+            for name, tree in zip(filenames, trees):
+                save_projection(name, tree)
+    trees = tuple(trees)
+    remember_projection(key, trees)
+    return trees
+
+def extract_labels(tree, min_cluster_size=2, method='leaf'):
+    ''' Return flat clusters (-1: noise) of a single linkage tree '''
+    labels = _tree_to_labels(
+        None,
+        tree,
+        min_cluster_size=min_cluster_size,
+        cluster_selection_method=method
+    )[0]
+    return labels
+
+def hdbscan_labels(data, min_samples=1, min_cluster_size=2, method='leaf', rank=None,
+                   metric='euclidean'):
+    ''' Return labels of HDBSCAN using the cached single linkage tree '''
+    tree, _ = hdbscan_trees(data, min_samples, rank, metric)
+    return extract_labels(tree, min_cluster_size, method)
+
+def hdbscan_grid(data, min_samples, min_cluster_sizes, methods=SELECTION_METHODS, rank=None,
+                 metric='euclidean'):
+    '''
+    Extract the clusters of HDBSCAN for every combination of parameters
+
+    Arguments:
+        data: feature matrix of one view
+        min_samples: list of min_samples, one tree is computed for each
+        min_cluster_sizes: list of min_cluster_size
+        methods: cluster selection methods (eom, leaf)
+        rank: number of leading SVD components to cluster, None for all
+        metric: euclidean or cosine
+    Returns:
+        dictionary of form (min_samples, min_cluster_size, method):labels,
+        list of table rows (min_samples, min_cluster_size, method, clusters, noise)
+    '''
+    labels = {}
+    rows = []
+    for samples in min_samples:
+        tree, _ = hdbscan_trees(data, samples, rank, metric)
+        for size in min_cluster_sizes:
+            for method in methods:
+                result = extract_labels(tree, size, method)
+                labels[(samples, size, method)] = result
+                rows.append([samples, size, method, len(set(result) - {-1}), np.sum(result == -1)])
+    return labels, rows
+
+def pretty_print(rows):
+    ''' Return an easy to read table '''
+    result = 'min_samples\tmin_cluster_size\tmethod\tclusters\tnoise'
+    for row in rows:
+        result += '\n%i\t%i\t%s\t%i\t%i' % tuple(row)
+    return result
+
+def save_grid(result_folder, matrix, labels):
+    ''' Write all labels of a grid into result_folder '''
+    if not os.path.exists(result_folder):
+        os.makedirs(result_folder)
+    np.savez(
+        os.path.join(result_folder, matrix + '_hdbscan.npz'),
+        **{'%i_%i_%s' % key: result for key, result in labels.items()}
+    )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        'data',
+        help='data to be clustered',
+        choices=['subreddits', 'adjectives', 'frequencies'],
+    )
+    parser.add_argument(
+        'matrix',
+        help='create feature matrix using normal, minimal, maximal or all three values',
+        choices=ACCEPTABLE_OPTIONS,
+    )
+    parser.add_argument(
+        '--min_samples',
+        nargs='+',
+        default=[1],
+        help='values of min_samples, the tree is computed once for each',
+        type=int
+    )
+    parser.add_argument(
+        '--sizes',
+        nargs='+',
+        default=[2, 3, 5, 10],
+        help='values of min_cluster_size',
+        type=int
+    )
+    parser.add_argument(
+        '--methods',
+        nargs='+',
+        default=SELECTION_METHODS,
+        choices=SELECTION_METHODS,
+        help='cluster selection methods'
+    )
+    parser.add_argument(
+        '--rank',
+        default=None,
+        help='number of leading SVD components to cluster',
+        type=int
+    )
+    parser.add_argument(
+        '--metric',
+        default='euclidean',
+        choices=METRICS,
+        help='distance between the lexica'
+    )
+    parser.add_argument(
+        '-r',
+        '--results',
+        default='_hdbscan',
+        help='folder for the labels'
+    )
+    args = vars(parser.parse_args())
+    if args['data'] in HISTORICAL_OPTIONS.keys():
+        data_set = HistoricalData(HISTORICAL_OPTIONS[args['data']])
+    else:
+        data_set = SubredditData(PATH_CLUSTERS)
+    grid_labels, table = hdbscan_grid(
+        data_set.sentiments[args['matrix']],
+        args['min_samples'],
+        args['sizes'],
+        args['methods'],
+        args['rank'],
+        args['metric']
+    )
+    save_grid(args['results'], args['matrix'], grid_labels)
+    print(pretty_print(table))
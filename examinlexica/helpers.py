@@ -1,102 +1,172 @@
 #! /usr/bin/env python3
 # -*- oding: utf-8 -*-
 
-''' Helper functions to create a SubredditData object '''
+''' Helper functions to create SubredditData and HistoricalData objects '''
 
+import os
 import json
-import csv
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import spacy
 
-def get_subreddits(path, files):
+from examinlexica.lexica import Lexica
+from examinlexica.manifest import Manifest
+from examinlexica.vocabulary import Vocabulary, words_fingerprint
+
+# number of tokens spacy processes at once
+LEMMA_BATCH_SIZE = 10000
+# file name of the cached store in each folder of lexica
+LEXICA_CACHE = 'lexica.npz'
+# stores already loaded by this process, key: path of the folder
+LOADED_LEXICA = {}
+
+def get_lexica(path, files):
     '''
-    Create or load subreddit dictionary
+    Create or load store of all lexica in path. This is the loader of every data
+    set (subreddits, historical adjectives and frequencies).
 
-    Arguments:
-        files: list of files that will be used to create subreddit dictionary
+    The store is cached in path (lexica.npz). If the cache is missing it is
+    created, lexica that were added, modified or removed since it was written
+    are patched into it. Within one process the store of each path is only
+    loaded once as long as the lexica do not change.
 
+    Arguments:
+        path: path to the folder containing the lexica
+        files: list of files in path
     Returns:
-        dictionary of subreddits
+        Lexica object containing all lexica
+    '''
+    cache_file = path + LEXICA_CACHE
+    manifest = Manifest(path, files, LEXICA_CACHE)
+    changed, removed = manifest.changes()
+    key = os.path.realpath(path)
+    lexica = LOADED_LEXICA.get(key)
+    if lexica is not None and not (changed or removed) \
+            and lexica.fingerprint == manifest.fingerprint():
+        manifest.save()
+        return lexica
+    lexica = None
+    if manifest.is_recorded():
+        lexica = Lexica.load(cache_file, manifest.fingerprint(recorded=True))
+    if lexica is None:
+        lexica = create_data(path, files)
+        lexica.save(cache_file, manifest.fingerprint())
+    elif changed or removed:
+        # only parse new or modified lexica and patch them into the store
+        lexica = lexica.update(create_data(path, changed), removed)
+        lexica.save(cache_file, manifest.fingerprint())
+    manifest.save()
+    LOADED_LEXICA[key] = lexica
+    return lexica
+
+def create_data(path, files, workers=None):
     '''
-    subreddits_file = path + 'subreddits.json'
-    if 'subreddits.json' in files:
-        with open(subreddits_file) as subreddits_file:
-            return json.load(subreddits_file)
-    sub_reddits = create_data(path, files)
-    with open(subreddits_file, 'w') as subreddits_in_file:
-        json.dump(sub_reddits, subreddits_in_file)
-    return sub_reddits
-
-def get_historical_adj(path, files):
-    ''' Create or load historical dictionary
+    Parse all lexica in files and merge them into one store
+
+    The lexica are parsed in parallel, each one as a single block.
 
     Arguments:
-        files: list of files used to create the dictionary
+        path: path to the folder containing the lexica
+        files: list of files in path, only tsv-files are used
+        workers: number of processes used for parsing (default: number of cores)
     Returns:
-        dictionary of historical lexica
+        Lexica object containing all lexica
     '''
-    adjectives_file = path + 'adjectives.json'
-    if adjectives_file in files:
-        with open(adjectives_file) as f:
-            return json.load(f)
-    adjectives = create_data(path, files)
-    with open(path + 'adjectives.json', 'w') as f:
-        json.dump(adjectives, f)
-    return adjectives
+    names = [data_file for data_file in files if data_file.endswith('tsv')]
+    filenames = [path + data_file for data_file in names]
+    if len(filenames) < 2 or workers == 1:
+        lexica = [read_lexicon(filename) for filename in filenames]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            lexica = list(executor.map(read_lexicon, filenames, chunksize=8))
+    return Lexica.from_arrays(names, lexica)
 
-def get_historical_freq(path, files):
-    ''' Create or load historical dictionary
+def read_lexicon(filename):
+    '''
+    Parse a lexicon (tsv-file of form: word, sentiment, standard derivation)
 
-    Arguments:
-        files: list of files used to create the dictionary
     Returns:
-        dictionary of historical lexica
+        array of words, array of sentiments, array of standard derivations
     '''
-    if 'frequencies.json' in files:
-        with open('frequencies.json') as f:
-            return json.load(f)
-    frequencies = create_data(files)
-    with open(path + 'frequencies.json', 'w') as f:
-        json.dump(frequencies, f)
-    return frequencies
-
-def create_data(path, files):
-    ''' Create a dictionary containing all files and and the sentiment of each word '''
-    data = {}
-    for data_file in files:
-        if not data_file.endswith('tsv'):
-            # file is not a subreddit
-            continue
-        with open(path + data_file) as f:
-            data[data_file] = {}
-            tsvreader = csv.reader(f, delimiter='\t')
-            for line in tsvreader:
-                sentiment = float(line[1])
-                standard_variance = float(line[2])
-                data[data_file][line[0]] = [sentiment, standard_variance]
-    return data
+    with open(filename) as f:
+        text = f.read().rstrip('\n')
+    if not text:
+        return (
+            np.array([], dtype=str),
+            np.array([], dtype=np.float64),
+            np.array([], dtype=np.float64)
+        )
+    fields = text.replace('\n', '\t').split('\t')
+    if len(fields) % 3:
+        raise ValueError('%s is not a lexicon of three columns' % filename)
+    return (
+        np.array(fields[0::3], dtype=str),
+        np.array(fields[1::3], dtype=np.float64),
+        np.array(fields[2::3], dtype=np.float64)
+    )
 
 def get_words_from_scratch(path, files):
     ''' Create word list out of all given subreddits '''
-    words = set({})
-    nlp = spacy.load('en')
-    files = [path +  f for f in files]
-    for data_file in files:
-        if not data_file.endswith('tsv'):
-            continue
-        with open(data_file) as f:
-            tsvreader = csv.reader(f, delimiter='\t')
-            for line in tsvreader:
-                lemmatized_word = nlp(line[0])
-                words.add(str(lemmatized_word))
-    words = list(words)
+    words = lemmatize_words(path, files)
     with open(path + 'words.txt', 'w') as f:
         f.write('\n'.join(words))
     return words
 
+def lemmatize_words(path, files, processes=1):
+    '''
+    Return list of all (lemmatized) words in the given lexica
+
+    Every distinct token is only processed once. Tokens already seen in an
+    earlier run are taken from the token cache (lemmas.json), all others are
+    processed in large batches by spacy and added to the cache.
+
+    Arguments:
+        path: path to the folder containing the lexica
+        files: list of lexica
+        processes: number of processes spacy uses
+    Returns:
+        list of all words
+    '''
+    tokens = set({})
+    for data_file in files:
+        if not data_file.endswith('tsv'):
+            continue
+        tokens.update(read_lexicon(path + data_file)[0].tolist())
+    lemmas = load_lemmas(path)
+    unseen = sorted(token for token in tokens if token not in lemmas)
+    if unseen:
+        nlp = spacy.load('en')
+        # the word is the text of the processed token, which only depends on
+        # the tokenizer, so no pipeline component has to run
+        with nlp.disable_pipes(*nlp.pipe_names):
+            docs = nlp.pipe(unseen, batch_size=LEMMA_BATCH_SIZE, n_process=processes)
+            for token, lemmatized_word in zip(unseen, docs):
+                lemmas[token] = str(lemmatized_word)
+        save_lemmas(path, lemmas)
+    return list({lemmas[token] for token in tokens})
+
+def load_lemmas(path):
+    ''' Return token cache of form token:lemmatized word '''
+    try:
+        with open(path + 'lemmas.json') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_lemmas(path, lemmas):
+    ''' Save token cache '''
+    with open(path + 'lemmas.json.tmp', 'w') as f:
+        json.dump(lemmas, f)
+    os.replace(path + 'lemmas.json.tmp', path + 'lemmas.json')
+
 def get_words(path, files):
     '''
     Create or load list of all words in the data filess
 
+    If the list already exists, only the words of lexica added or modified
+    since it was written are lemmatized and appended to the list. Thus the
+    position of all known words stays the same.
+
     Arguments:
         files: list of files that will be used to create word list
 
@@ -104,14 +174,45 @@ def get_words(path, files):
         list of all words in the data filess
     '''
     words_file = path + 'words.txt'
+    manifest = Manifest(path, files, 'words.txt')
+    changed, _ = manifest.changes()
     if 'words.txt' in files:
         with open(words_file) as f:
             words = f.read().split('\n')
+        # without a record the list is assumed to belong to the current lexica
+        if manifest.is_recorded() and changed:
+            known_words = set(words)
+            new_words = [
+                word for word in lemmatize_words(path, changed) if word not in known_words
+            ]
+            if new_words:
+                words.extend(new_words)
+                with open(words_file, 'w') as f:
+                    f.write('\n'.join(words))
     else:
         print('Need to get all words first. This will take a while.')
         words = get_words_from_scratch(path, files)
+    manifest.save()
     return words
 
+def get_vocabulary(path, words):
+    '''
+    Create or load the index of the word list (word -> column and back)
+
+    Arguments:
+        path: path to the folder containing the lexica
+        words: list of all words in column order
+    Returns:
+        Vocabulary object
+    '''
+    index_file = path + 'vocabulary.npz'
+    source_fingerprint = words_fingerprint(words)
+    vocabulary = Vocabulary.load(index_file, source_fingerprint)
+    if vocabulary is None:
+        vocabulary = Vocabulary(words, fingerprint=source_fingerprint)
+        vocabulary.save(index_file, source_fingerprint)
+    return vocabulary
+
 def get_lexica_order(path):
     ''' Return order of the feature vectors in matrix '''
     with open(path + 'order.txt') as f:
@@ -0,0 +1,86 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Kmeans for a sequence of numbers of clusters.
+
+Three modes are available:
+    cold        every number of clusters is fitted from scratch (k-means++)
+    warm        the fit for k+1 clusters starts at the converged centroids of k
+                clusters, of which the cluster with the largest inertia is
+                split in two (as in bisecting Kmeans)
+    minibatch   mini batch Kmeans, from scratch, for large views
+
+A warm started fit usually converges in a few iterations and needs no restarts,
+so a sweep over many numbers of clusters is much faster. Use the benchmark of
+evaluate/kmeans_benchmark.py to check the change of the inertia.
+'''
+
+import numpy as np
+import sklearn.cluster as cluster
+
+KMEANS_MODES = ['cold', 'warm', 'minibatch']
+
+def assign(data, centroids):
+    ''' Return closest centroid and squared distance to it of every point '''
+    distances = (
+        np.sum(data ** 2, axis=1)[:, None]
+        - 2 * data @ centroids.T
+        + np.sum(centroids ** 2, axis=1)[None, :]
+    )
+    labels = np.argmin(distances, axis=1)
+    return labels, np.clip(distances[np.arange(len(data)), labels], 0, None)
+
+def split_centroids(data, centroids, number_of_clusters):
+    '''
+    Add centroids until there are number_of_clusters. Each time the cluster with
+    the largest inertia is split in two by Kmeans, i.e. its centroid is
+    replaced by the two centroids of its halves.
+    '''
+    centroids = np.array(centroids)
+    while len(centroids) < number_of_clusters:
+        labels, distances = assign(data, centroids)
+        inertia = np.bincount(labels, weights=distances, minlength=len(centroids))
+        worst = np.argmax(inertia)
+        members = data[labels == worst]
+        if len(members) < 2:
+            # no cluster can be split, start at the point farthest from its centroid
+            centroids = np.vstack([centroids, data[np.argmax(distances)]])
+            continue
+        halves = cluster.KMeans(n_clusters=2, n_init=3, random_state=0).fit(members)
+        centroids[worst] = halves.cluster_centers_[0]
+        centroids = np.vstack([centroids, halves.cluster_centers_[1]])
+    return centroids
+
+def cold_kmeans(number_of_clusters, mode='cold'):
+    ''' Return unfitted Kmeans (mode cold or warm) or mini batch Kmeans '''
+    if mode == 'minibatch':
+        return cluster.MiniBatchKMeans(n_clusters=number_of_clusters)
+    return cluster.KMeans(n_clusters=number_of_clusters)
+
+def kmeans_models(data, clusters, mode='cold'):
+    '''
+    Fit Kmeans for every number of clusters
+
+    Arguments:
+        data: projected data
+        clusters: numbers of clusters
+        mode: cold, warm or minibatch
+    Yields:
+        number of clusters and fitted model in ascending order of the numbers
+    '''
+    if mode not in KMEANS_MODES:
+        raise ValueError('unknown Kmeans mode %s' % mode)
+    model = None
+    for number_of_clusters in sorted(clusters):
+        if mode == 'warm' and model is not None:
+            init = split_centroids(data, model.cluster_centers_, number_of_clusters)
+            model = cluster.KMeans(n_clusters=number_of_clusters, init=init, n_init=1)
+        else:
+            model = cold_kmeans(number_of_clusters, mode)
+        yield number_of_clusters, model.fit(data)
+
+def kmeans_labels(data, clusters, mode='cold'):
+    ''' Yield number of clusters and labels of Kmeans for every number of clusters '''
+    for number_of_clusters, model in kmeans_models(data, clusters, mode):
+        yield number_of_clusters, model.labels_
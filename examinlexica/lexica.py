@@ -0,0 +1,226 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Columnar store of all lexica in a folder.
+
+Instead of a nested dictionary of the form lexicon:word:[sentiment, derivation]
+all entries of all lexica are kept in a few flat arrays:
+    names       file name of each lexicon, in the order of the store
+    offsets     entries of lexicon i are found at offsets[i]:offsets[i+1]
+    word_ids    position of the word of each entry in the vocabulary
+    sentiments  sentiment of each entry
+    deviations  standard derivation of each entry
+    vocabulary  all words found in the lexica
+
+The store is saved as an uncompressed npz-file, which loads in milliseconds.
+The file carries a version and a fingerprint of the content of its source files
+(see manifest.py). Changed lexica can be replaced without rebuilding the store.
+'''
+
+import os
+import numpy as np
+
+# increase this whenever the layout of the cache changes
+CACHE_VERSION = 1
+
+class Lexica:
+    '''
+    All entries of all lexica in a folder stored in flat arrays.
+
+    Attributes:
+        names: array of the lexicon names (file names)
+        offsets: array of length len(names) + 1 delimiting the entries of each lexicon
+        word_ids: array containing the vocabulary index of each entry
+        sentiments: array containing the sentiment of each entry
+        deviations: array containing the standard derivation of each entry
+        vocabulary: array of all words in the lexica
+        fingerprint: fingerprint of the source files once the store is saved or
+            loaded
+    '''
+    def __init__(self, names, offsets, word_ids, sentiments, deviations, vocabulary):
+        ''' Initialize the store from its arrays '''
+        self.names = names
+        self.offsets = offsets
+        self.word_ids = word_ids
+        self.sentiments = sentiments
+        self.deviations = deviations
+        self.vocabulary = vocabulary
+        self.fingerprint = None
+        self.positions = {name: position for position, name in enumerate(names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __contains__(self, name):
+        return name in self.positions
+
+    def keys(self):
+        ''' Return names of all lexica in the order of the store '''
+        return [str(name) for name in self.names]
+
+    def index(self, name):
+        ''' Return position of lexicon name in the store '''
+        return self.positions[name]
+
+    def entries(self, name):
+        '''
+        Return all entries of a lexicon
+
+        Arguments:
+            name: name of the lexicon
+        Returns:
+            word ids, sentiments and standard derivations of the lexicon
+        '''
+        position = self.positions[name]
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return (
+            self.word_ids[start:end],
+            self.sentiments[start:end],
+            self.deviations[start:end]
+        )
+
+    def lexicon(self, name):
+        ''' Return dictionary of form word:[sentiment, derivation] of one lexicon '''
+        word_ids, sentiments, deviations = self.entries(name)
+        return {
+            str(word): [float(sentiment), float(deviation)]
+            for word, sentiment, deviation in zip(
+                self.vocabulary[word_ids],
+                sentiments,
+                deviations
+            )
+        }
+
+    @classmethod
+    def from_arrays(cls, names, lexica):
+        '''
+        Create store out of the parsed lexica
+
+        Arguments:
+            names: list of lexicon names
+            lexica: list of tuples (words, sentiments, derivations), one per name
+        Returns:
+            Lexica object whose vocabulary is the union of all words
+        '''
+        offsets = np.zeros(len(names) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(words) for words, _, _ in lexica])
+        if lexica:
+            words = np.concatenate([words for words, _, _ in lexica])
+            sentiments = np.concatenate([sentiments for _, sentiments, _ in lexica])
+            deviations = np.concatenate([deviations for _, _, deviations in lexica])
+        else:
+            words = np.array([], dtype=str)
+            sentiments = np.array([], dtype=np.float64)
+            deviations = np.array([], dtype=np.float64)
+        vocabulary, word_ids = np.unique(words, return_inverse=True)
+        return cls(
+            np.array(names, dtype=str),
+            offsets,
+            word_ids.astype(np.int32),
+            sentiments,
+            deviations,
+            vocabulary
+        )
+
+    def update(self, lexica, removed=()):
+        '''
+        Return a store in which the lexica of another store replace the lexica
+        of the same name. Lexica unknown to this store are appended and removed
+        lexica are dropped. All other lexica keep their position and all words
+        keep their id, new words are appended to the vocabulary.
+
+        Arguments:
+            lexica: Lexica object containing new or changed lexica
+            removed: names of lexica to drop
+        Returns:
+            the updated Lexica object
+        '''
+        # map the vocabulary of the new lexica onto this vocabulary
+        word_map = np.zeros(len(lexica.vocabulary), dtype=np.int64)
+        known = np.zeros(len(lexica.vocabulary), dtype=bool)
+        if len(self.vocabulary):
+            sorter = np.argsort(self.vocabulary)
+            positions = np.searchsorted(self.vocabulary, lexica.vocabulary, sorter=sorter)
+            word_map = sorter[np.minimum(positions, len(sorter) - 1)]
+            known = self.vocabulary[word_map] == lexica.vocabulary
+        word_map[~known] = len(self.vocabulary) + np.arange(np.count_nonzero(~known))
+        vocabulary = np.concatenate([self.vocabulary, lexica.vocabulary[~known]])
+
+        removed = set(removed)
+        names = [name for name in self.keys() if name not in removed]
+        names.extend(name for name in lexica.keys() if name not in self.positions)
+        word_ids, sentiments, deviations = [], [], []
+        for name in names:
+            if name in lexica:
+                ids, sentiment, deviation = lexica.entries(name)
+                ids = word_map[ids]
+            else:
+                ids, sentiment, deviation = self.entries(name)
+            word_ids.append(ids.astype(np.int32))
+            sentiments.append(sentiment)
+            deviations.append(deviation)
+        offsets = np.zeros(len(names) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(ids) for ids in word_ids])
+        return Lexica(
+            np.array(names, dtype=str),
+            offsets,
+            np.concatenate(word_ids + [np.array([], dtype=np.int32)]),
+            np.concatenate(sentiments + [np.array([])]),
+            np.concatenate(deviations + [np.array([])]),
+            vocabulary
+        )
+
+    def save(self, filename, source_fingerprint):
+        ''' Save store as npz-file tagged with the fingerprint of its sources '''
+        temporary_file = filename + '.tmp'
+        with open(temporary_file, 'wb') as f:
+            np.savez(
+                f,
+                version=np.array(CACHE_VERSION),
+                fingerprint=np.array(source_fingerprint),
+                names=self.names,
+                offsets=self.offsets,
+                word_ids=self.word_ids,
+                sentiments=self.sentiments,
+                deviations=self.deviations,
+                vocabulary=self.vocabulary
+            )
+        os.replace(temporary_file, filename)
+        self.fingerprint = source_fingerprint
+
+    @classmethod
+    def load(cls, filename, source_fingerprint):
+        '''
+        Load store from npz-file
+
+        Arguments:
+            filename: path to the npz-file
+            source_fingerprint: fingerprint of the current source files
+        Returns:
+            the store or None if the file is missing, of another version or stale
+        '''
+        if not os.path.exists(filename):
+            return None
+        try:
+            with np.load(filename) as cache:
+                if int(cache['version']) != CACHE_VERSION:
+                    return None
+                if str(cache['fingerprint']) != source_fingerprint:
+                    return None
+                lexica = cls(
+                    cache['names'],
+                    cache['offsets'],
+                    cache['word_ids'],
+                    cache['sentiments'],
+                    cache['deviations'],
+                    cache['vocabulary']
+                )
+                lexica.fingerprint = source_fingerprint
+                return lexica
+        except (OSError, KeyError, ValueError):
+            # unreadable or incomplete cache, it is simply rebuilt
+            return None
@@ -0,0 +1,90 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Agglomerative clustering by cutting one linkage tree.
+
+The hierarchy of average linkage clustering does not depend on the number of
+clusters, thus it is built only once per view (and rank) and cached next to the
+projection of the view. The clusters for any number of clusters are then read
+off the tree by cutting it, which is linear in the number of lexica instead of
+rebuilding the whole hierarchy for every number of clusters. The tree is built
+from the shared pairwise distances of pairwise.py.
+'''
+
+import os
+import numpy as np
+from scipy.cluster import hierarchy
+
+from examinlexica.pairwise import condensed_distances
+from examinlexica.reduction import (
+    projection_name,
+    load_projection,
+    save_projection,
+    remember_projection,
+    PROJECTIONS
+    )
+
+def tree_name(filename, rank, method, metric):
+    ''' Return filename of the linkage tree of the projection in filename '''
+    folder, name = os.path.split(projection_name(filename, rank))
+    return os.path.join(folder, '%s-%s_%s' % (method, metric, name))
+
+def linkage_tree(data, rank=None, method='average', metric='euclidean', distances=None):
+    '''
+    Return the linkage tree of a view
+
+    If data is a view with a fingerprint (SentimentMatrix), the tree is looked
+    up in memory and on disk first and only built if it is not cached yet.
+
+    Arguments:
+        data: feature matrix
+        rank: number of leading SVD components to cluster, None for all
+        method: linkage method (see scipy.cluster.hierarchy.linkage)
+        metric: euclidean or cosine
+        distances: condensed distances of the lexica at this rank and metric,
+            computed (see pairwise.py) if None
+    Returns:
+        linkage matrix of scipy
+    '''
+    key = getattr(data, 'fingerprint', None)
+    filename = getattr(data, 'projection_file', None)
+    if key is None:
+        if distances is None:
+            distances = condensed_distances(data, metric, rank)
+        return hierarchy.linkage(distances, method=method)
+    key = (key, method, metric, rank)
+    if key in PROJECTIONS:
+        PROJECTIONS.move_to_end(key)
+        return PROJECTIONS[key]
+    filename = tree_name(filename, rank, method, metric) if filename else None
+    tree = load_projection(filename) if filename else None
+    if tree is None or len(tree) != data.shape[0] - 1:
+        if distances is None:
+            distances = condensed_distances(data, metric, rank)
+        tree = hierarchy.linkage(distances, method=method)
+        if filename:
+            save_projection(filename, tree)
+    remember_projection(key, tree)
+    return tree
+
+def cut_tree(tree, clusters):
+    '''
+    Cut the linkage tree for every number of clusters
+
+    Arguments:
+        tree: linkage matrix
+        clusters: numbers of clusters
+    Yields:
+        number of clusters and labels
+    '''
+    clusters = list(clusters)
+    if not clusters:
+        return
+    labels = hierarchy.cut_tree(tree, n_clusters=clusters)
+    for column, number_of_clusters in enumerate(clusters):
+        yield number_of_clusters, np.asarray(labels[:, column])
+
+def aggl_labels(data, clusters, rank=None, metric='euclidean'):
+    ''' Yield number of clusters and labels of average linkage clustering '''
+    return cut_tree(linkage_tree(data, rank, 'average', metric), clusters)
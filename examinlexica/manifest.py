@@ -0,0 +1,108 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Manifest of the lexica every cached file of a folder was built from.
+
+For each cached file (e.g. the binary store of the lexica or the word list) the
+manifest records modification time, size and hash of each lexicon at the time
+the cache was written. This allows to only process new or changed lexica
+instead of rebuilding the whole cache.
+All records are kept in manifest.json in the folder of the lexica.
+'''
+
+import os
+import json
+import hashlib
+
+MANIFEST_FILE = 'manifest.json'
+
+def file_hash(filename):
+    ''' Return sha1 hash of a file '''
+    sha = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+class Manifest:
+    '''
+    State of all lexica a cached file was built from.
+
+    Attributes:
+        artifact: name of the cached file
+        recorded: dictionary of form lexicon:[mtime, size, hash] as recorded when
+            the cached file was written or None if there is no record
+        current: dictionary of the same form describing the lexica right now,
+            filled by changes()
+    '''
+    def __init__(self, path, files, artifact):
+        '''
+        Arguments:
+            path: path to the folder containing the lexica
+            files: list of files in path, only tsv-files are considered
+            artifact: name of the cached file
+        '''
+        self.path = path
+        self.artifact = artifact
+        self.lexica = sorted(data_file for data_file in files if data_file.endswith('tsv'))
+        self.recorded = self.load().get(artifact)
+        self.current = {}
+
+    def load(self):
+        ''' Return all records of the folder '''
+        try:
+            with open(os.path.join(self.path, MANIFEST_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def is_recorded(self):
+        ''' Return whether the cached file has a record in the manifest '''
+        return self.recorded is not None
+
+    def changes(self):
+        '''
+        Compare the lexica with the record of the cached file.
+        A lexicon is only hashed if its modification time or size changed.
+
+        Returns:
+            list of new or modified lexica, list of removed lexica
+        '''
+        recorded = self.recorded or {}
+        changed = []
+        for data_file in self.lexica:
+            status = os.stat(os.path.join(self.path, data_file))
+            entry = recorded.get(data_file)
+            if entry and entry[0] == status.st_mtime_ns and entry[1] == status.st_size:
+                self.current[data_file] = entry
+                continue
+            digest = file_hash(os.path.join(self.path, data_file))
+            self.current[data_file] = [status.st_mtime_ns, status.st_size, digest]
+            if not entry or entry[2] != digest:
+                changed.append(data_file)
+        removed = [data_file for data_file in recorded if data_file not in self.current]
+        return changed, removed
+
+    def fingerprint(self, recorded=False):
+        '''
+        Return fingerprint of the content of all lexica, either of their current
+        state or of the recorded one
+        '''
+        entries = (self.recorded or {}) if recorded else self.current
+        sha = hashlib.sha1()
+        for data_file in sorted(entries):
+            sha.update(('%s\t%s\n' % (data_file, entries[data_file][2])).encode())
+        return sha.hexdigest()
+
+    def save(self):
+        ''' Record the current state of the lexica for the cached file '''
+        if self.current == self.recorded:
+            return
+        records = self.load()
+        records[self.artifact] = self.current
+        filename = os.path.join(self.path, MANIFEST_FILE)
+        with open(filename + '.tmp', 'w') as f:
+            json.dump(records, f)
+        os.replace(filename + '.tmp', filename)
+        self.recorded = dict(self.current)
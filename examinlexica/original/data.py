@@ -7,40 +7,250 @@ HistoricalData
 '''
 
 import os
+import hashlib
 import numpy as np
+from scipy import sparse as sp
 
-from examinlexica.helpers import get_words
+from examinlexica.helpers import get_words, get_vocabulary
+from examinlexica.constants import ACCEPTABLE_OPTIONS
+from examinlexica.original.matrix import SentimentMatrix
+from examinlexica.shared import map_matrix, save_matrix, remove_stale_matrices
+
+class Views:
+    '''
+    Dictionary of views (normal, minimum, maximum, all) whose values are only
+    created when they are accessed for the first time. Created views are kept
+    until they are released.
+    '''
+    def __init__(self, create_view, views=ACCEPTABLE_OPTIONS):
+        '''
+        Arguments:
+            create_view: function returning the feature matrix of a view
+            views: names of all available views
+        '''
+        self.create_view = create_view
+        self.views = list(views)
+        self.created = {}
+
+    def __getitem__(self, view):
+        if view not in self.views:
+            raise KeyError(view)
+        if view not in self.created:
+            self.created[view] = self.create_view(view)
+        return self.created[view]
+
+    def __contains__(self, view):
+        return view in self.views
+
+    def __iter__(self):
+        return iter(self.views)
+
+    def __len__(self):
+        return len(self.views)
+
+    def keys(self):
+        return list(self.views)
+
+    def values(self):
+        return [self[view] for view in self.views]
+
+    def items(self):
+        return [(view, self[view]) for view in self.views]
+
+    def is_created(self, view):
+        ''' Return whether the view is currently held in memory '''
+        return view in self.created
+
+    def release(self, view=None):
+        ''' Free the memory of a view or, if no view is given, of all views '''
+        if view is None:
+            self.created.clear()
+        else:
+            self.created.pop(view, None)
 
 class Data:
     '''
     An abstract object containing all sentiment information in all files in the folder
     specified by path.
     '''
-    def __init__(self, path):
-        ''' Initialize an object containing all sentiment data '''
+    def __init__(self, path, sparse=False, shared=False, dtype=np.float64):
+        '''
+        Initialize an object containing all sentiment data
+
+        Arguments:
+            path: Path to the folder containing the lexica
+            sparse: store the views as scipy.sparse CSR matrices instead of
+                dense arrays
+            shared: write each view once to the matrices folder in path and
+                map it read-only, so parallel processes share one copy
+            dtype: data type of the views, e.g. float32 to halve their memory;
+                float16 is only meant for storage, computations upcast it
+        '''
+        if sparse and np.dtype(dtype) == np.float16:
+            raise ValueError('scipy.sparse does not support float16, use float32')
         self.files = os.listdir(path)
         self.words = get_words(path, self.files)
+        self.vocabulary = get_vocabulary(path, self.words)
         self.path = path
+        self.sparse = sparse
+        self.shared = shared
+        self.dtype = np.dtype(dtype)
+        self.fingerprint = None
         self.order = []
+        self.rows = {}
+        self.matrix_entries = None
         self.sentiments = {}
 
-    def transform_sentiments(self):
-        ''' Transform list of lists of sentiments into a numpy array '''
-        for view, sentiments in self.sentiments.items():
-            self.sentiments[view] = np.array(sentiments)
+    def word_columns(self, lexica):
+        ''' Return column of each word in the vocabulary of lexica (-1 if unused) '''
+        return self.vocabulary.columns(lexica.vocabulary)
 
-    def compare_data_frames(self, index_one, index_two, word, view):
-        if view:
-            print(self.sentiments[view])
-            df = self.sentiments[view].loc[[index_one]][word]
-            df2 = self.sentiments[view].loc[[index_two]][word]
+    def entries(self, lexica):
+        '''
+        Return position of every entry of the lexica in the feature matrix
+
+        Arguments:
+            lexica: Lexica object containing all lexica
+        Returns:
+            rows, columns, sentiments and standard derivations of all entries
+            whose word is part of the word list
+        '''
+        rows = np.repeat(np.arange(len(lexica)), np.diff(lexica.offsets))
+        columns = self.word_columns(lexica)[lexica.word_ids]
+        used = columns >= 0
+        return (
+            rows[used],
+            columns[used],
+            lexica.sentiments[used],
+            lexica.deviations[used]
+        )
+
+    def view_entries(self, view):
+        '''
+        Return all non-zero entries of a view
+
+        Arguments:
+            view: normal, minimum, maximum or all
+        Returns:
+            rows, columns, values and shape of the view
+        '''
+        rows, columns, sentiments, deviations = self.matrix_entries
+        shape = (len(self.order), len(self.words))
+        if view == 'normal':
+            return rows, columns, sentiments, shape
+        if view == 'minimum':
+            return rows, columns, np.round(sentiments - deviations, 2), shape
+        if view == 'maximum':
+            return rows, columns, np.round(sentiments + deviations, 2), shape
+        if view == 'all':
+            # minimum, normal and maximum of each word next to each other, i.e.
+            # the view is a (lexicon x word x 3) array reshaped to two dimensions
+            return (
+                np.tile(rows, 3),
+                np.concatenate([3 * columns, 3 * columns + 1, 3 * columns + 2]),
+                np.concatenate([
+                    np.round(sentiments - deviations, 2),
+                    sentiments,
+                    np.round(sentiments + deviations, 2)
+                ]),
+                (shape[0], 3 * shape[1])
+            )
+        raise KeyError(view)
+
+    def create_view(self, view):
+        '''
+        Create a view of form lexicon x words, backed either by a CSR matrix or
+        by a numpy array. Missing words are 0 in every view.
+        '''
+        if self.shared:
+            matrix = self.shared_matrix(view)
         else:
-            df = self.sentiments.loc[[index_one]][word]
-            df2 = self.sentiments.loc[[index_two]][word]
+            matrix = self.build_matrix(view)
+        return SentimentMatrix(
+            matrix,
+            view,
+            self.order,
+            self.rows,
+            self.vocabulary,
+            self.matrix_name(view),
+            os.path.join(self.path, 'projections', self.matrix_name(view))
+        )
 
-        return df, df2
+    def build_matrix(self, view):
+        ''' Return view as numpy array or CSR matrix '''
+        rows, columns, values, shape = self.view_entries(view)
+        # an entry written twice keeps its last value in both kinds of views,
+        # the CSR constructor would add the duplicates up
+        flat = np.asarray(rows, dtype=np.int64) * shape[1] + columns
+        _, last = np.unique(flat[::-1], return_index=True)
+        keep = len(flat) - 1 - last
+        rows, columns, values = rows[keep], columns[keep], values[keep]
+        # values are rounded in double precision before they are converted
+        values = values.astype(self.dtype)
+        if self.sparse:
+            matrix = sp.csr_matrix((values, (rows, columns)), shape=shape, dtype=self.dtype)
+            matrix.eliminate_zeros()
+            return matrix
+        matrix = np.zeros(shape, dtype=self.dtype)
+        matrix[rows, columns] = values
+        return matrix
 
+    def matrix_name(self, view):
+        ''' Return name of a view, it changes whenever the data of the view does '''
+        kind = 'sparse' if self.sparse else 'dense'
+        return '%s_%s_%s_%s' % (view, kind, self.dtype.name, self.fingerprint[:16])
 
+    def matrix_file(self, view):
+        ''' Return path (without extension) of the shared matrix of a view '''
+        return os.path.join(self.path, 'matrices', self.matrix_name(view))
+
+    def shared_matrix(self, view):
+        '''
+        Return the view mapped read-only from its shared matrix file. If no
+        process wrote the file yet, the view is built and written first.
+        '''
+        filename = self.matrix_file(view)
+        matrix = map_matrix(filename, self.sparse)
+        if matrix is None:
+            save_matrix(filename, self.build_matrix(view))
+            remove_stale_matrices(
+                filename[:-len(self.fingerprint[:16])] + '*',
+                filename
+            )
+            matrix = map_matrix(filename, self.sparse)
+        return matrix
+
+    def set_matrices(self, lexica):
+        '''
+        Prepare all views of the lexica. A view is only created once it is
+        accessed for the first time.
+        '''
+        self.order = lexica.keys()
+        self.rows = {lexicon: row for row, lexicon in enumerate(self.order)}
+        self.fingerprint = hashlib.sha1(
+            ('%s\n%s' % (lexica.fingerprint, self.vocabulary.fingerprint)).encode()
+        ).hexdigest()
+        self.matrix_entries = self.entries(lexica)
+        self.sentiments = Views(self.create_view)
+
+    def lookup(self, lexica, words, view='normal'):
+        '''
+        Return sentiments of a batch of words in a batch of lexica
+
+        Arguments:
+            lexica: list of lexicon names
+            words: list of words
+            view: normal, minimum, maximum or all
+        Returns:
+            array of form lexica x words, for the view all of form
+            lexica x words x (minimum, normal, maximum)
+        '''
+        return self.sentiments[view].loc(lexica, words)
+
+    def compare_data_frames(self, index_one, index_two, word, view):
+        ''' Return sentiment(s) of a word in two lexica '''
+        values = self.lookup([index_one, index_two], [word], view)
+        return values[0], values[1]
 
     def save_order(self):
         ''' save order of reddits/decades in featurematrix '''
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Lightweight replacement of the panda data frames holding the views.
+
+A SentimentMatrix keeps the array of a view (dense or CSR) together with the
+order of the lexica (rows) and the vocabulary index (columns). Column labels
+are never stored: the column of a word is looked up in the vocabulary index and,
+for the view all, the column of a statistic (min, normal, max) of a word is
+computed from it.
+'''
+
+import numpy as np
+from scipy import sparse as sp
+
+# position of each statistic of a word in the view all
+STATISTICS = {'min': 0, 'normal': 1, 'max': 2}
+
+class SentimentMatrix:
+    '''
+    Feature matrix of one view.
+
+    Attributes:
+        values: numpy array or CSR matrix of form lexica x words
+            (lexica x words * 3 for the view all)
+        view: name of the view (normal, minimum, maximum or all)
+        order: list of lexica in the order of the rows
+        rows: dictionary of form lexicon:row
+        vocabulary: Vocabulary object mapping words to columns
+        fingerprint: string identifying the data of the view, None if unknown
+        projection_file: path (without extension) at which the projection of
+            the view is cached, None to cache it in memory only
+    '''
+    def __init__(self, values, view, order, rows, vocabulary, fingerprint=None,
+                 projection_file=None):
+        self.values = values
+        self.view = view
+        self.order = order
+        self.rows = rows
+        self.vocabulary = vocabulary
+        self.fingerprint = fingerprint
+        self.projection_file = projection_file
+
+    def __len__(self):
+        return self.values.shape[0]
+
+    def __array__(self, dtype=None, copy=None):
+        values = self.values.toarray() if sp.issparse(self.values) else self.values
+        return np.asarray(values, dtype=dtype)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+    @property
+    def index(self):
+        ''' Return lexica in the order of the rows '''
+        return self.order
+
+    @property
+    def columns(self):
+        ''' Return labels of all columns (word, or wordmin, word, wordmax for all) '''
+        words = self.vocabulary.words
+        if self.view != 'all':
+            return words
+        return np.stack(
+            [np.char.add(words, 'min'), words, np.char.add(words, 'max')],
+            axis=1
+        ).ravel()
+
+    def column_index(self, words, statistic=None):
+        '''
+        Return columns of words
+
+        Arguments:
+            words: list of words
+            statistic: for the view all: min, normal, max or None for all three
+        Returns:
+            array of columns, of form words x 3 for the view all without statistic
+        '''
+        columns = self.vocabulary.columns(words)
+        if (columns < 0).any():
+            raise KeyError([word for word, column in zip(words, columns) if column < 0])
+        if self.view != 'all':
+            return columns
+        if statistic is None:
+            return 3 * columns[:, None] + np.arange(3)
+        return 3 * columns + STATISTICS[statistic]
+
+    def row_index(self, lexica):
+        ''' Return rows of lexica '''
+        return np.array([self.rows[lexicon] for lexicon in lexica], dtype=np.int64)
+
+    def loc(self, lexica, words, statistic=None):
+        '''
+        Return sentiments of a batch of words in a batch of lexica
+
+        Arguments:
+            lexica: list of lexicon names
+            words: list of words
+            statistic: for the view all: min, normal, max or None for all three
+        Returns:
+            array of form lexica x words, for the view all without statistic
+            of form lexica x words x (min, normal, max)
+        '''
+        rows = self.row_index(lexica)
+        columns = self.column_index(words, statistic)
+        if sp.issparse(self.values):
+            values = self.values[rows][:, columns.ravel()].toarray()
+        else:
+            values = self.values[np.ix_(rows, columns.ravel())]
+        return values.reshape((len(rows),) + columns.shape)
+
+    def row(self, lexicon):
+        ''' Return feature vector of a lexicon '''
+        vector = self.values[self.rows[lexicon]]
+        return vector.toarray().ravel() if sp.issparse(vector) else vector
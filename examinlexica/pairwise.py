@@ -0,0 +1,98 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Pairwise distances between the lexica shared by all clustering algorithms.
+
+The distances between the projected feature vectors are computed once per view,
+metric and rank out of the gram matrix of the projection (a single matrix
+product) and cached in memory and next to the projection as a condensed
+distance matrix (see scipy.spatial.distance.squareform). Average linkage and
+HDBSCAN use them with metric='precomputed' for every number of clusters and
+every parameter.
+
+Available metrics:
+    euclidean   sqrt(|x|^2 + |y|^2 - 2 x.y)
+    cosine      1 - x.y / (|x| |y|), 1 for lexica without any entry
+'''
+
+import os
+import numpy as np
+from scipy.spatial.distance import squareform
+
+from examinlexica.reduction import (
+    project,
+    projection_name,
+    load_projection,
+    save_projection,
+    remember_projection,
+    PROJECTIONS
+    )
+
+METRICS = ['euclidean', 'cosine']
+
+def distances_name(filename, rank, metric):
+    ''' Return filename of the distances of the projection in filename '''
+    folder, name = os.path.split(projection_name(filename, rank))
+    return os.path.join(folder, 'distances-%s_%s' % (metric, name))
+
+def compute_distances(projection, metric='euclidean'):
+    ''' Return condensed distance matrix of the rows of projection '''
+    projection = np.asarray(projection, dtype=np.float64)
+    if metric not in METRICS:
+        raise ValueError('unknown metric %s' % metric)
+    norms = np.einsum('ij,ij->i', projection, projection)
+    if metric == 'cosine':
+        lengths = np.sqrt(norms)
+        lengths[lengths == 0] = np.inf
+        projection = projection / lengths[:, None]
+    gram = projection @ projection.T
+    if metric == 'euclidean':
+        distances = np.sqrt(np.clip(norms[:, None] + norms[None, :] - 2 * gram, 0, None))
+    else:
+        distances = np.clip(1 - gram, 0, 2)
+    np.fill_diagonal(distances, 0)
+    # gram is symmetric up to rounding, use the upper triangle only
+    return squareform(np.triu(distances) + np.triu(distances, 1).T, checks=False)
+
+def condensed_distances(data, metric='euclidean', rank=None, projection=None):
+    '''
+    Return condensed distance matrix of the projected lexica
+
+    If data is a view with a fingerprint (SentimentMatrix), the distances are
+    looked up in memory and on disk first and only computed if they are not
+    cached yet.
+
+    Arguments:
+        data: feature matrix
+        metric: euclidean or cosine
+        rank: number of leading SVD components, None for all
+        projection: projection of data of this rank, computed if None
+    Returns:
+        condensed distance matrix
+    '''
+    key = getattr(data, 'fingerprint', None)
+    filename = getattr(data, 'projection_file', None)
+    if projection is None and key is None:
+        projection = project(data, rank)
+    if key is None:
+        return compute_distances(projection, metric)
+    key = (key, 'distances', metric, rank)
+    if key in PROJECTIONS:
+        PROJECTIONS.move_to_end(key)
+        return PROJECTIONS[key]
+    filename = distances_name(filename, rank, metric) if filename else None
+    distances = load_projection(filename) if filename else None
+    rows = data.shape[0]
+    if distances is None or len(distances) != rows * (rows - 1) // 2:
+        if projection is None:
+            projection = project(data, rank)
+        distances = compute_distances(projection, metric)
+        if filename:
+            save_projection(filename, distances)
+    remember_projection(key, distances)
+    return distances
+
+def distance_matrix(data, metric='euclidean', rank=None, projection=None):
+    ''' Return square distance matrix of the projected lexica '''
+    return squareform(condensed_distances(data, metric, rank, projection))
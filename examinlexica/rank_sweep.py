@@ -0,0 +1,165 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Cluster one view with different numbers of SVD components.
+
+The view is decomposed only once. Since the components of the projection u*s
+are sorted by their singular values, the projection of rank r is simply its
+first r columns (u[:, :r] * s[:r]). Every chosen algorithm is applied to each
+rank and the results are summarised in one table:
+    rank        number of SVD components
+    variance    share of the variance kept by the components
+    clusters    number of clusters found (HDBSCAN: without noise)
+    silhouette  silhouette coefficient of the clusters using the components
+    ARI         adjusted rand index compared to the labels of the highest rank
+
+The table is written to 'view_ranks.txt' and all labels to 'view_ranks.npz'
+(key: algorithm_rank) in the results folder.
+'''
+
+import os
+import argparse
+import numpy as np
+from sklearn import metrics
+
+from examinlexica.cluster import get_algorithms, clarguments_checks
+from examinlexica.reduction import project, explained_variance
+from examinlexica.original.subreddit_data import SubredditData
+from examinlexica.original.historical_data import HistoricalData
+from examinlexica.constants import (
+    PATH_CLUSTERS,
+    HISTORICAL_OPTIONS,
+    ACCEPTABLE_OPTIONS
+    )
+
+def silhouette(data, labels):
+    ''' Return silhouette coefficient, nan if it is undefined '''
+    if not 1 < len(set(labels)) < len(labels):
+        return np.nan
+    return metrics.silhouette_score(data, labels)
+
+def sweep_ranks(data, ranks, number_of_clusters, algorithm):
+    '''
+    Apply the clustering algorithms to the leading components of the view
+
+    Arguments:
+        data: feature matrix of one view
+        ranks: list of numbers of SVD components
+        number_of_clusters: number of clusters for Kmeans and aggl. clustering
+        algorithm: algorithm to use for clustering or all
+    Returns:
+        dictionary of form (algorithm, rank):labels, list of table rows
+        (algorithm, rank, variance, clusters, silhouette, ARI)
+    '''
+    projection = project(data, max(ranks))
+    variance = explained_variance(data, projection)
+    ranks = sorted(set(min(rank, projection.shape[1]) for rank in ranks), reverse=True)
+    labels = {}
+    rows = []
+    for name, clusterer, kwds in get_algorithms(number_of_clusters, algorithm):
+        for rank in ranks:
+            reduced = np.ascontiguousarray(projection[:, :rank])
+            result = clusterer(**kwds).fit_predict(reduced)
+            labels[(name, rank)] = result
+            rows.append([
+                name,
+                rank,
+                variance[rank - 1],
+                len(set(result) - {-1}),
+                silhouette(reduced, result),
+                metrics.adjusted_rand_score(labels[(name, ranks[0])], result)
+            ])
+    rows.sort(key=lambda row: (row[0], row[1]))
+    return labels, rows
+
+def pretty_print(rows):
+    ''' Return an easy to read table '''
+    result = 'algorithm\trank\tvariance\tclusters\tsilhouette\tARI'
+    for row in rows:
+        result += '\n%s\t%i\t%.4f\t%i\t%.4f\t%.4f' % tuple(row)
+    return result
+
+def save_sweep(result_folder, matrix, labels, rows):
+    ''' Write the table and all labels of a sweep into result_folder '''
+    if not os.path.exists(result_folder):
+        os.makedirs(result_folder)
+    filename = os.path.join(result_folder, matrix + '_ranks')
+    np.savez(
+        filename + '.npz',
+        **{'%s_%i' % (name, rank): result for (name, rank), result in labels.items()}
+    )
+    with open(filename + '.txt', 'w') as f:
+        f.write(pretty_print(rows))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        'data',
+        help='data to be clustered',
+        choices=['subreddits', 'adjectives', 'frequencies'],
+    )
+    parser.add_argument(
+        'matrix',
+        help='create feature matrix using normal, minimal, maximal or all three values',
+        choices=ACCEPTABLE_OPTIONS,
+    )
+    parser.add_argument(
+        '-a',
+        '--algorithm',
+        help='algorithm to use for clustering',
+        default='all',
+        choices=['Aggl', 'Kmeans', 'HDBSCAN'],
+    )
+    parser.add_argument(
+        '-c',
+        '--clusters',
+        default=0,
+        help='number of clusters used for aggl. and Kmeans clustering',
+        type=int
+    )
+    parser.add_argument(
+        '--ranks',
+        nargs='+',
+        default=[2, 5, 10, 20, 50, 100],
+        help='numbers of SVD components to cluster',
+        type=int
+    )
+    parser.add_argument(
+        '-r',
+        '--results',
+        default='_ranks',
+        help='folder for the table and the labels'
+    )
+    parser.add_argument(
+        '-s',
+        '--sparse',
+        action='store_true',
+        help='store the feature matrices as sparse matrices'
+    )
+    parser.add_argument(
+        '--shared',
+        action='store_true',
+        help='map the feature matrices from files shared by parallel runs'
+    )
+    parser.add_argument(
+        '--dtype',
+        default='float64',
+        choices=['float64', 'float32', 'float16'],
+        help='data type of the feature matrices (float16 only for storage)'
+    )
+    args = vars(parser.parse_args())
+    if clarguments_checks(args['matrix'], args['clusters']):
+        if args['data'] in HISTORICAL_OPTIONS.keys():
+            path = HISTORICAL_OPTIONS[args['data']]
+            data_set = HistoricalData(path, args['sparse'], args['shared'], args['dtype'])
+        else:
+            data_set = SubredditData(PATH_CLUSTERS, args['sparse'], args['shared'], args['dtype'])
+        sweep_labels, table = sweep_ranks(
+            data_set.sentiments[args['matrix']],
+            args['ranks'],
+            args['clusters'],
+            args['algorithm']
+        )
+        save_sweep(args['results'], args['matrix'], sweep_labels, table)
+        print(pretty_print(table))
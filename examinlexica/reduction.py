@@ -0,0 +1,187 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Dimensionality reduction of the feature matrices before clustering.
+
+All clustering functions work on the data projected onto its singular vectors
+(u*s of the thin singular value decomposition). The projection keeps all
+euclidean distances between the feature vectors intact.
+
+The projection of a view only depends on its data, thus it is computed once
+and reused by every clustering run: the last projections are kept in memory and,
+if the view names a projection file, on disk next to the lexica. Both caches are
+keyed by the fingerprint of the view, which changes with the lexica, the word
+list, the data type and the kind (dense, sparse) of the view.
+'''
+
+import os
+import glob
+from collections import OrderedDict
+
+import numpy as np
+from scipy import sparse as sp
+from sklearn.utils.extmath import randomized_svd
+
+# number of projections kept in memory
+PROJECTION_CACHE_SIZE = 8
+PROJECTIONS = OrderedDict()
+
+def decompose(data, rank=None):
+    '''
+    Project data onto its (leading) singular vectors
+
+    Dense data is decomposed with np.linalg.svd. Sparse data is never
+    densified: u*s is computed out of the eigen decomposition of the (small)
+    gram matrix of the rows, or, if there are more rows than columns, out of
+    the right singular vectors.
+
+    The projection has the precision of data: float32 data is decomposed in
+    single precision, float16 data (a storage format) is upcast to float32. The
+    gram matrix of sparse data is always decomposed in double precision and
+    only the projection is cast back.
+
+    If a rank smaller than the full rank is given, only the leading rank
+    components are computed using a randomized SVD (dense or sparse data).
+
+    Arguments:
+        data: numpy array or scipy.sparse matrix
+        rank: number of components, None for all
+    Returns:
+        numpy array u*s of shape lexica x min(lexica, features) or lexica x rank
+    '''
+    if rank is not None and rank < min(data.shape):
+        if data.dtype == np.float16:
+            data = data.astype(np.float32)
+        u, s, _ = randomized_svd(data, rank, random_state=0)
+        return u*s
+    if not sp.issparse(data):
+        data = np.asarray(data)
+        if data.dtype == np.float16:
+            data = data.astype(np.float32)
+        u, s, _ = np.linalg.svd(data, full_matrices=False)
+        return u*s
+    data = sp.csr_matrix(data)
+    # squaring the singular values in the gram matrix doubles the relative
+    # error, thus it is always decomposed in double precision
+    dtype = np.float32 if data.dtype in (np.float16, np.float32) else np.float64
+    data = data.astype(np.float64)
+    rows, columns = data.shape
+    if rows <= columns:
+        gram = (data @ data.T).toarray()
+        eigenvalues, eigenvectors = np.linalg.eigh(gram)
+        order = np.argsort(eigenvalues)[::-1]
+        s = np.sqrt(np.clip(eigenvalues[order], 0, None))
+        return (eigenvectors[:, order] * s).astype(dtype)
+    gram = (data.T @ data).toarray()
+    eigenvalues, eigenvectors = np.linalg.eigh(gram)
+    order = np.argsort(eigenvalues)[::-1]
+    return np.asarray(data @ eigenvectors[:, order]).astype(dtype)
+
+def explained_variance(data, projection):
+    '''
+    Return share of the (uncentered) variance of data kept by each number of
+    leading components of its projection
+
+    Arguments:
+        data: feature matrix the projection was computed of
+        projection: u*s of data, possibly truncated
+    Returns:
+        array whose r-th entry (starting at 0) is the share kept by r+1 components
+    '''
+    data = getattr(data, 'values', data)
+    if sp.issparse(data):
+        total = np.sum(np.square(data.data, dtype=np.float64))
+    else:
+        total = np.sum(np.square(np.asarray(data), dtype=np.float64))
+    # the norm of the i-th column of u*s is the i-th singular value
+    variance = np.sum(np.square(projection, dtype=np.float64), axis=0)
+    return np.cumsum(variance) / total
+
+def projection_name(filename, rank):
+    ''' Return filename of the projection of the given rank '''
+    if rank is None:
+        return filename
+    folder, name = os.path.split(filename)
+    return os.path.join(folder, 'rank%i_%s' % (rank, name))
+
+def load_projection(filename):
+    ''' Return projection saved in filename (without extension), None if missing '''
+    try:
+        return np.load(filename + '.npy')
+    except (OSError, ValueError):
+        return None
+
+def save_projection(filename, projection):
+    '''
+    Write projection to filename (without extension) and delete the outdated
+    projections of the same view. A folder that cannot be written to is
+    silently skipped, the projection is then only cached in memory.
+    '''
+    folder, name = os.path.split(filename)
+    try:
+        if not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+        temporary = '%s.%i.tmp' % (filename, os.getpid())
+        with open(temporary, 'wb') as f:
+            np.save(f, projection)
+        os.replace(temporary, filename + '.npy')
+    except OSError:
+        return
+    # the name ends with the fingerprint of the data, see Data.matrix_name
+    prefix = name.rsplit('_', 1)[0]
+    for outdated in glob.glob(os.path.join(folder, prefix + '_*.npy')):
+        if outdated != filename + '.npy':
+            try:
+                os.remove(outdated)
+            except OSError:
+                continue
+
+def remember_projection(key, projection):
+    ''' Keep projection in memory, dropping the least recently used one '''
+    PROJECTIONS[key] = projection
+    PROJECTIONS.move_to_end(key)
+    while len(PROJECTIONS) > PROJECTION_CACHE_SIZE:
+        PROJECTIONS.popitem(last=False)
+
+def clear_projections():
+    ''' Forget all projections kept in memory '''
+    PROJECTIONS.clear()
+
+def project(data, rank=None):
+    '''
+    Return the projection u*s of data onto its (leading) singular vectors
+
+    If data is a view with a fingerprint (SentimentMatrix), the projection is
+    looked up in memory and on disk first and only decomposed if it is not
+    cached yet. Each caller gets its own copy, as some algorithms (e.g. the
+    KD-tree of HDBSCAN) need writable data.
+
+    Arguments:
+        data: feature matrix (SentimentMatrix, numpy array, data frame or
+            scipy.sparse matrix)
+        rank: number of components computed by a randomized SVD, None for the
+            exact projection with all components
+    Returns:
+        numpy array u*s of shape lexica x min(lexica, features) or lexica x rank
+    '''
+    key = getattr(data, 'fingerprint', None)
+    filename = getattr(data, 'projection_file', None)
+    # unwrap SentimentMatrix and data frames without densifying sparse views
+    values = getattr(data, 'values', data)
+    if rank is not None and rank >= min(values.shape):
+        rank = None
+    if key is None:
+        return decompose(values, rank)
+    key = (key, rank)
+    filename = projection_name(filename, rank) if filename else None
+    if key in PROJECTIONS:
+        PROJECTIONS.move_to_end(key)
+        return PROJECTIONS[key].copy()
+    projection = load_projection(filename) if filename else None
+    if projection is None or projection.shape[0] != values.shape[0]:
+        projection = decompose(values, rank)
+        if filename:
+            save_projection(filename, projection)
+    remember_projection(key, projection)
+    return projection.copy()
@@ -0,0 +1,495 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Run a whole grid of clustering experiments from one sweep specification.
+
+The specification (a JSON or YAML file) lists the data sets, views, ranks,
+metrics, algorithms and numbers of clusters. Every cell of the grid is split
+into stages:
+    load        read the lexica of a data set
+    view        create the feature matrix of a view
+    reduce      project the view onto its (leading) singular vectors
+    distances   pairwise distances of the lexica and the trees of aggl.
+                clustering and HDBSCAN built from them
+    fit         cluster the projection
+    evaluate    save the labels and the clusters and compute the silhouette
+    plot        draw the clusters into the t-SNE embedding of the view
+Stages are identified by their parameters, thus a stage needed by many cells
+(e.g. the projection of a view) is computed only once and its result is handed
+to all stages depending on it. Every stage starts as soon as its inputs are
+available: the reductions, distances, trees, embeddings, Kmeans fits,
+evaluations and plots run on a pool of worker processes, loading the data and
+cutting the trees in the main process. Results are released once no remaining
+stage needs them. The progress is printed after every stage.
+
+A specification looks like this (all keys but datasets and views are optional):
+    {
+        "datasets": ["subreddits", "adjectives"],
+        "views": ["normal", "all"],
+        "ranks": [null, 50],
+        "metrics": ["euclidean", "cosine"],
+        "algorithms": ["Kmeans", "Aggl", "HDBSCAN"],
+        "clusters": {"start": 5, "end": 20},
+        "kmeans": "warm",
+        "hdbscan": {"min_samples": 1, "min_cluster_size": 2, "method": "leaf"},
+        "sparse": false,
+        "dtype": "float64",
+        "plot": false,
+        "seed": 0,
+        "results": "sweep",
+        "workers": 4
+    }
+"clusters" is either a list or a range. The labels of each data set, rank and
+metric are saved like the results of cluster.py in
+'results/dataset/rank-metric_results' (readable by ClusteredData), the clusters
+in readable form in 'results/dataset/rank-metric_clusters' and a table of all
+fits in 'results/summary.txt'.
+'''
+
+import os
+import json
+import time
+import argparse
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+from scipy.spatial.distance import squareform
+from sklearn import metrics
+from threadpoolctl import threadpool_limits
+
+from examinlexica.sweep import thread_budget
+from examinlexica.reduction import project
+from examinlexica.pairwise import condensed_distances
+from examinlexica.linkage import linkage_tree, cut_tree
+from examinlexica.hdbscan_grid import hdbscan_trees, extract_labels
+from examinlexica.kmeans_sweep import kmeans_labels
+from examinlexica.visualize import embed, plot_clusters
+from examinlexica.original.subreddit_data import SubredditData
+from examinlexica.original.historical_data import HistoricalData
+from examinlexica.constants import PATH_CLUSTERS, HISTORICAL_OPTIONS
+
+DEFAULT_SPEC = {
+    'ranks': [None],
+    'metrics': ['euclidean'],
+    'algorithms': ['Kmeans', 'Aggl', 'HDBSCAN'],
+    'clusters': [10],
+    'kmeans': 'cold',
+    'hdbscan': {'min_samples': 1, 'min_cluster_size': 2, 'method': 'leaf'},
+    'sparse': False,
+    'dtype': 'float64',
+    'plot': False,
+    'seed': 0,
+    'results': 'sweep',
+    'workers': None,
+    'threads': None,
+    'paths': {}
+}
+
+def read_spec(filename):
+    '''
+    Read a sweep specification from a JSON or (if PyYAML is installed) a
+    YAML file and fill in the defaults
+    '''
+    with open(filename) as f:
+        if filename.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError('reading YAML specifications requires PyYAML')
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+    for key, value in DEFAULT_SPEC.items():
+        spec.setdefault(key, value)
+    clusters = spec['clusters']
+    if isinstance(clusters, dict):
+        spec['clusters'] = list(range(clusters['start'], clusters['end'] + 1))
+    elif isinstance(clusters, int):
+        spec['clusters'] = [clusters]
+    return spec
+
+def setting_name(rank, metric):
+    ''' Return name of the folder of the results of a rank and a metric '''
+    return '%s-%s' % ('full' if rank is None else 'rank%i' % rank, metric)
+
+class ViewHandle:
+    '''
+    Fingerprint, cache location and shape of a view. The stages in the worker
+    processes get the handle instead of the view to look up and store their
+    results in the caches of reduction.py without sending the data of the view.
+    '''
+    def __init__(self, matrix):
+        self.fingerprint = matrix.fingerprint
+        self.projection_file = matrix.projection_file
+        self.shape = matrix.shape
+
+# stages run in the main process
+
+def load_stage(dataset, paths, sparse, dtype):
+    ''' Return SubredditData or HistoricalData object of a data set '''
+    if dataset in HISTORICAL_OPTIONS.keys():
+        return HistoricalData(paths.get(dataset, HISTORICAL_OPTIONS[dataset]), sparse, dtype=dtype)
+    return SubredditData(paths.get(dataset, PATH_CLUSTERS), sparse, dtype=dtype)
+
+def view_stage(data, view):
+    ''' Return feature matrix of a view '''
+    return data.sentiments[view]
+
+def order_stage(data):
+    ''' Return the lexica in the order of the rows '''
+    return list(data.order)
+
+def handle_stage(matrix):
+    ''' Return the handle of a view '''
+    return ViewHandle(matrix)
+
+def fit_aggl(tree, clusters):
+    ''' Return labels of average linkage clustering for all numbers of clusters '''
+    return OrderedDict(('aggl_%i' % k, labels) for k, labels in cut_tree(tree, clusters))
+
+def fit_hdbscan(tree, min_cluster_size, method):
+    ''' Return labels of HDBSCAN '''
+    return OrderedDict([('HDBSCAN', extract_labels(tree, min_cluster_size, method))])
+
+# stages run by the worker processes
+
+def reduce_stage(matrix, rank):
+    ''' Return projection of a view '''
+    return project(matrix, rank)
+
+def distances_stage(handle, projection, metric, rank):
+    ''' Return condensed distance matrix of the projected lexica '''
+    return condensed_distances(handle, metric, rank, projection)
+
+def linkage_stage(handle, distances, metric, rank):
+    ''' Return average linkage tree of a view '''
+    return linkage_tree(handle, rank, 'average', metric, distances)
+
+def hdbscan_stage(handle, distances, metric, rank, min_samples):
+    ''' Return single linkage tree of HDBSCAN of a view '''
+    return hdbscan_trees(handle, min_samples, rank, metric, distances)[0]
+
+def embedding_stage(handle, projection, seed):
+    ''' Return t-SNE embedding of a view '''
+    return embed(handle, seed, projection)
+
+def fit_kmeans(projection, clusters, mode):
+    ''' Return labels of Kmeans (cold, warm or minibatch) for all numbers of clusters '''
+    return OrderedDict(
+        ('Kmeans_%i' % k, labels) for k, labels in kmeans_labels(projection, clusters, mode)
+    )
+
+def evaluate_stage(fit, order, distances, folder, view):
+    '''
+    Save labels and readable clusters of a fit and return its rows of the summary
+
+    Arguments:
+        fit: dictionary of form name:labels (e.g. Kmeans_10)
+        order: lexica in the order of the rows
+        distances: condensed distance matrix of the lexica
+        folder: folder of the results of the data set, rank and metric
+        view: name of the view
+    Returns:
+        list of rows: name, number of clusters found, silhouette coefficient
+    '''
+    results = folder + '_results'
+    readable = folder + '_clusters'
+    for output in [results, readable]:
+        if not os.path.exists(output):
+            os.makedirs(output, exist_ok=True)
+    square = squareform(distances)
+    rows = []
+    for name, labels in fit.items():
+        np.save(os.path.join(results, '%s_%s_labels.npy' % (view, name)), labels)
+        clusters = OrderedDict()
+        for lexicon, label in zip(order, labels):
+            clusters.setdefault(label, []).append(lexicon)
+        with open(os.path.join(readable, '%s_%s.txt' % (view, name)), 'w') as f:
+            f.write('\n'.join(
+                'Cluster %i: %s' % (label, ', '.join(lexica))
+                for label, lexica in sorted(clusters.items())
+            ))
+        if 1 < len(clusters) < len(labels):
+            silhouette = metrics.silhouette_score(square, labels, metric='precomputed')
+        else:
+            silhouette = np.nan
+        rows.append([name, len(set(labels) - {-1}), silhouette])
+    return rows
+
+def plot_stage(fit, embedding, prefix):
+    ''' Draw every clustering of a fit into the embedding '''
+    for name, labels in fit.items():
+        plot_clusters(embedding, labels, prefix + name)
+
+def init_stage_worker(threads):
+    ''' Limit the threads of a worker process '''
+    threadpool_limits(limits=threads)
+
+def run_stage(function, inputs, arguments):
+    ''' Run a stage on the results of its input stages, return result and run time '''
+    start = time.time()
+    result = function(*(list(inputs) + list(arguments)))
+    return result, time.time() - start
+
+class Scheduler:
+    '''
+    Directed acyclic graph of stages.
+
+    A stage is identified by a key (a tuple of its name and parameters). Adding
+    a stage with an existing key returns the existing stage, thus every stage
+    is computed once. A stage is started as soon as the results of all its
+    input stages are available: pooled stages are submitted to the worker
+    pool, the others (cheap ones, or ones holding data that should not be sent
+    between processes) run in the main process. The result of a stage is
+    dropped once all stages depending on it are finished; only the results of
+    the final stages (without dependents) are kept.
+    '''
+    def __init__(self):
+        self.stages = OrderedDict()
+        self.results = {}
+        self.finished = 0
+
+    def add(self, key, function, dependencies=(), arguments=(), pool=False):
+        '''
+        Add a stage (if it does not exist yet) and return its key
+
+        Arguments:
+            key: tuple identifying the stage
+            function: function called with the results of the dependencies
+                followed by arguments (a module level function for pooled stages)
+            dependencies: keys of the input stages
+            arguments: further arguments of function
+            pool: run the stage on the worker pool
+        '''
+        if key not in self.stages:
+            self.stages[key] = {
+                'function': function,
+                'dependencies': list(dependencies),
+                'arguments': list(arguments),
+                'pool': pool,
+                'dependents': 0
+            }
+            for dependency in dependencies:
+                self.stages[dependency]['dependents'] += 1
+        return key
+
+    def progress(self, key, seconds):
+        ''' Print the number of finished stages '''
+        print('[%i/%i] %s (%.2fs)' % (
+            self.finished,
+            len(self.stages),
+            ' '.join(str(part) for part in key),
+            seconds
+        ))
+
+    def finish(self, key, result, seconds, waiting):
+        ''' Store the result of a stage and release the inputs no longer needed '''
+        self.results[key] = result
+        self.finished += 1
+        self.progress(key, seconds)
+        for dependency in self.stages[key]['dependencies']:
+            waiting[dependency] -= 1
+            if not waiting[dependency]:
+                del self.results[dependency]
+
+    def run(self, workers=None, threads=None):
+        '''
+        Run all stages
+
+        Arguments:
+            workers: number of processes of the pool, None for one per core, 1
+                to run all stages in this process
+            threads: BLAS threads per process, None to split the cores evenly
+        Returns:
+            dictionary of form key:result of every stage without dependents
+        '''
+        workers = workers or os.cpu_count() or 1
+        waiting = {key: stage['dependents'] for key, stage in self.stages.items()}
+        pending = OrderedDict((key, None) for key in self.stages)
+        running = {}
+        executor = None
+        if workers > 1:
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=init_stage_worker,
+                initargs=(thread_budget(workers, threads),)
+            )
+        try:
+            while pending or running:
+                for key in list(pending):
+                    stage = self.stages[key]
+                    if not all(dependency in self.results for dependency in stage['dependencies']):
+                        continue
+                    del pending[key]
+                    inputs = [self.results[dependency] for dependency in stage['dependencies']]
+                    if stage['pool'] and executor:
+                        future = executor.submit(
+                            run_stage, stage['function'], inputs, stage['arguments']
+                        )
+                        running[future] = key
+                    else:
+                        self.finish(
+                            key, *run_stage(stage['function'], inputs, stage['arguments']),
+                            waiting
+                        )
+                        # results of the main process may make further stages ready
+                        break
+                else:
+                    if not running:
+                        if pending:
+                            raise ValueError('stages with missing inputs: %s' % list(pending))
+                        continue
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self.finish(running.pop(future), *future.result(), waiting)
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+        return self.results
+
+def build_sweep(spec):
+    '''
+    Add all stages of a sweep specification to a new scheduler
+
+    Returns:
+        scheduler, list of (data set, view, rank, metric, key of the evaluation)
+    '''
+    scheduler = Scheduler()
+    evaluations = []
+    algorithms = [algorithm.upper() for algorithm in spec['algorithms']]
+    hdbscan_parameters = spec['hdbscan']
+    for dataset in spec['datasets']:
+        data = scheduler.add(
+            ('load', dataset),
+            load_stage,
+            arguments=(dataset, spec['paths'], spec['sparse'], spec['dtype'])
+        )
+        order = scheduler.add(('order', dataset), order_stage, [data])
+        for view in spec['views']:
+            matrix = scheduler.add(('view', dataset, view), view_stage, [data], [view])
+            handle = scheduler.add(('handle', dataset, view), handle_stage, [matrix])
+            if spec['plot']:
+                # t-SNE always starts from the projection with all components
+                full_projection = scheduler.add(
+                    ('reduce', dataset, view, None), reduce_stage, [matrix], [None], pool=True
+                )
+                embedding = scheduler.add(
+                    ('embedding', dataset, view, spec['seed']),
+                    embedding_stage,
+                    [handle, full_projection],
+                    [spec['seed']],
+                    pool=True
+                )
+            for rank in spec['ranks']:
+                projection = scheduler.add(
+                    ('reduce', dataset, view, rank), reduce_stage, [matrix], [rank], pool=True
+                )
+                kmeans = None
+                if 'KMEANS' in algorithms and spec['clusters']:
+                    kmeans = scheduler.add(
+                        ('fit', dataset, view, rank, 'Kmeans', spec['kmeans']),
+                        fit_kmeans,
+                        [projection],
+                        [spec['clusters'], spec['kmeans']],
+                        pool=True
+                    )
+                for metric in spec['metrics']:
+                    distances = scheduler.add(
+                        ('distances', dataset, view, rank, metric),
+                        distances_stage,
+                        [handle, projection],
+                        [metric, rank],
+                        pool=True
+                    )
+                    fits = [kmeans] if kmeans else []
+                    if 'AGGL' in algorithms and spec['clusters']:
+                        tree = scheduler.add(
+                            ('linkage', dataset, view, rank, metric),
+                            linkage_stage,
+                            [handle, distances],
+                            [metric, rank],
+                            pool=True
+                        )
+                        # cutting the tree is cheap, it runs in the main process
+                        fits.append(scheduler.add(
+                            ('fit', dataset, view, rank, metric, 'aggl'),
+                            fit_aggl,
+                            [tree],
+                            [spec['clusters']]
+                        ))
+                    if 'HDBSCAN' in algorithms:
+                        tree = scheduler.add(
+                            ('hdbscan', dataset, view, rank, metric,
+                             hdbscan_parameters['min_samples']),
+                            hdbscan_stage,
+                            [handle, distances],
+                            [metric, rank, hdbscan_parameters['min_samples']],
+                            pool=True
+                        )
+                        fits.append(scheduler.add(
+                            ('fit', dataset, view, rank, metric, 'HDBSCAN'),
+                            fit_hdbscan,
+                            [tree],
+                            [hdbscan_parameters['min_cluster_size'], hdbscan_parameters['method']]
+                        ))
+                    folder = os.path.join(spec['results'], dataset, setting_name(rank, metric))
+                    for fit in fits:
+                        evaluation = scheduler.add(
+                            ('evaluate', metric) + fit[1:],
+                            evaluate_stage,
+                            [fit, order, distances],
+                            [folder, view],
+                            pool=True
+                        )
+                        evaluations.append((dataset, view, rank, metric, evaluation))
+                        if spec['plot']:
+                            scheduler.add(
+                                ('plot', metric) + fit[1:],
+                                plot_stage,
+                                [fit, embedding],
+                                ['%s_%s_%s_' % (dataset, setting_name(rank, metric), view)],
+                                pool=True
+                            )
+    return scheduler, evaluations
+
+def summary(results, evaluations):
+    ''' Return an easy to read table of all fits '''
+    table = 'dataset\tview\trank\tmetric\talgorithm\tclusters\tsilhouette'
+    for dataset, view, rank, metric, key in evaluations:
+        for name, clusters, silhouette in results[key]:
+            table += '\n%s\t%s\t%s\t%s\t%s\t%i\t%.4f' % (
+                dataset, view, 'full' if rank is None else rank, metric, name, clusters, silhouette
+            )
+    return table
+
+def run_spec(spec):
+    ''' Run a sweep specification and return the summary of all fits '''
+    scheduler, evaluations = build_sweep(spec)
+    results = scheduler.run(spec['workers'], spec['threads'])
+    table = summary(results, evaluations)
+    if not os.path.exists(spec['results']):
+        os.makedirs(spec['results'])
+    with open(os.path.join(spec['results'], 'summary.txt'), 'w') as f:
+        f.write(table)
+    return table
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        'spec',
+        help='sweep specification (JSON or YAML file)'
+    )
+    parser.add_argument(
+        '-w',
+        '--workers',
+        default=None,
+        help='number of worker processes (overrides the specification)',
+        type=int
+    )
+    args = vars(parser.parse_args())
+    sweep_spec = read_spec(args['spec'])
+    if args['workers']:
+        sweep_spec['workers'] = args['workers']
+    print(run_spec(sweep_spec))
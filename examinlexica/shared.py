@@ -0,0 +1,92 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Feature matrices shared between processes.
+
+A view is written once to a npy-file (a sparse view to one npy-file per CSR
+array). Every process afterwards maps the file read-only instead of building
+its own copy of the view, thus all processes share one physical copy of the
+data in the page cache.
+'''
+
+import os
+import glob
+import numpy as np
+from scipy import sparse as sp
+
+SPARSE_PARTS = ['data', 'indices', 'indptr']
+
+def matrix_files(filename, sparse):
+    ''' Return all files belonging to a shared matrix '''
+    if sparse:
+        return [filename + '.' + part + '.npy' for part in SPARSE_PARTS]
+    return [filename + '.npy']
+
+def save_matrix(filename, matrix):
+    '''
+    Write a dense or CSR matrix to disk. The files are written under a temporary
+    name and renamed afterwards, so other processes never map a half written
+    matrix.
+
+    Arguments:
+        filename: path of the matrix without extension
+        matrix: numpy array or scipy.sparse matrix
+    '''
+    folder = os.path.dirname(filename)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder, exist_ok=True)
+    if sp.issparse(matrix):
+        matrix = sp.csr_matrix(matrix)
+        arrays = [matrix.data, matrix.indices, matrix.indptr]
+        targets = matrix_files(filename, True)
+        shape = np.array(matrix.shape, dtype=np.int64)
+        targets.append(filename + '.shape.npy')
+        arrays.append(shape)
+    else:
+        arrays = [np.ascontiguousarray(matrix)]
+        targets = matrix_files(filename, False)
+    temporary_suffix = '.%i.tmp' % os.getpid()
+    for array, target in zip(arrays, targets):
+        with open(target + temporary_suffix, 'wb') as f:
+            np.save(f, array)
+    # the first file is renamed last, it marks the matrix as complete
+    for target in reversed(targets):
+        os.replace(target + temporary_suffix, target)
+
+def map_matrix(filename, sparse):
+    '''
+    Map a shared matrix read-only
+
+    Arguments:
+        filename: path of the matrix without extension
+        sparse: whether the matrix is a CSR matrix
+    Returns:
+        numpy memmap or CSR matrix backed by memmaps, None if the matrix does
+        not exist
+    '''
+    files = matrix_files(filename, sparse)
+    if sparse:
+        files.append(filename + '.shape.npy')
+    if not all(os.path.exists(part) for part in files):
+        return None
+    try:
+        if not sparse:
+            return np.load(files[0], mmap_mode='r')
+        data, indices, indptr = [np.load(part, mmap_mode='r') for part in files[:3]]
+        shape = tuple(np.load(files[3]))
+        return sp.csr_matrix((data, indices, indptr), shape=shape, copy=False)
+    except (OSError, ValueError):
+        return None
+
+def remove_stale_matrices(pattern, keep):
+    '''
+    Delete shared matrices matching pattern except the one named keep.
+    Processes still mapping a deleted matrix keep their mapping.
+    '''
+    for filename in glob.glob(pattern):
+        if not filename.startswith(keep + '.'):
+            try:
+                os.remove(filename)
+            except OSError:
+                continue
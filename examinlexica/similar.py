@@ -0,0 +1,199 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Find the lexica with the most similar sentiments to other lexica.
+
+The index holds the (optionally SVD reduced) feature vectors of a view, for the
+cosine metric scaled to unit length. The distances of a batch of lexica to all
+lexica are computed with a single matrix product per batch and the k closest
+lexica are selected with np.argpartition, thus querying every lexicon of a view
+is as fast as querying one. The projection of the view is shared with the
+clustering scripts (see reduction.py); at full rank it keeps all distances.
+
+Available metrics (as in pairwise.py):
+    euclidean   sqrt(|x|^2 + |y|^2 - 2 x.y)
+    cosine      1 - x.y / (|x| |y|), 1 for lexica without any entry
+'''
+
+import argparse
+import numpy as np
+
+from examinlexica.reduction import project
+from examinlexica.pairwise import METRICS
+from examinlexica.original.subreddit_data import SubredditData
+from examinlexica.original.historical_data import HistoricalData
+from examinlexica.constants import (
+    PATH_CLUSTERS,
+    HISTORICAL_OPTIONS,
+    ACCEPTABLE_OPTIONS
+    )
+
+# number of lexica whose distances to all lexica are computed at once
+BATCH_SIZE = 1024
+
+class SimilarityIndex:
+    '''
+    Top-k neighbour index over the lexica of a view.
+
+    Attributes:
+        vectors: projected feature vectors (unit length for cosine)
+        norms: squared length of the vectors
+        metric: euclidean or cosine
+        order: list of lexica in the order of the rows
+        rows: dictionary of form lexicon:row
+    '''
+    def __init__(self, data, metric='cosine', rank=None):
+        '''
+        Arguments:
+            data: feature matrix of a view (SentimentMatrix or array)
+            metric: euclidean or cosine
+            rank: number of leading SVD components to compare, None for all
+        '''
+        if metric not in METRICS:
+            raise ValueError('unknown metric %s' % metric)
+        vectors = np.asarray(project(data, rank), dtype=np.float64)
+        norms = np.einsum('ij,ij->i', vectors, vectors)
+        if metric == 'cosine':
+            lengths = np.sqrt(norms)
+            lengths[lengths == 0] = np.inf
+            vectors = vectors / lengths[:, None]
+            norms = np.einsum('ij,ij->i', vectors, vectors)
+        self.vectors = vectors
+        self.norms = norms
+        self.metric = metric
+        self.order = list(getattr(data, 'order', range(len(vectors))))
+        self.rows = getattr(data, 'rows', None) or {
+            lexicon: row for row, lexicon in enumerate(self.order)
+        }
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def distances(self, rows):
+        ''' Return distances of the lexica in rows to all lexica '''
+        gram = self.vectors[rows] @ self.vectors.T
+        if self.metric == 'cosine':
+            return np.clip(1 - gram, 0, 2)
+        return np.sqrt(np.clip(self.norms[rows, None] + self.norms[None, :] - 2 * gram, 0, None))
+
+    def query_rows(self, rows, k=10, exclude_self=True):
+        '''
+        Return the k closest lexica of every row
+
+        Arguments:
+            rows: rows of the queried lexica
+            k: number of neighbours
+            exclude_self: do not return the queried lexicon itself
+        Returns:
+            array of neighbouring rows and array of their distances, both of
+            form rows x k and sorted by distance
+        '''
+        rows = np.asarray(rows, dtype=np.int64)
+        k = max(0, min(k, len(self) - 1 if exclude_self else len(self)))
+        neighbours = np.empty((len(rows), k), dtype=np.int64)
+        distances = np.empty((len(rows), k))
+        if k <= 0:
+            return neighbours, distances
+        for start in range(0, len(rows), BATCH_SIZE):
+            batch = rows[start:start + BATCH_SIZE]
+            batch_distances = self.distances(batch)
+            if exclude_self:
+                batch_distances[np.arange(len(batch)), batch] = np.inf
+            closest = np.argpartition(batch_distances, k - 1, axis=1)[:, :k]
+            closest_distances = np.take_along_axis(batch_distances, closest, axis=1)
+            # ties are broken by the row to get reproducible results
+            ranking = np.lexsort((closest, closest_distances), axis=1)
+            neighbours[start:start + BATCH_SIZE] = np.take_along_axis(closest, ranking, axis=1)
+            distances[start:start + BATCH_SIZE] = np.take_along_axis(
+                closest_distances, ranking, axis=1)
+        return neighbours, distances
+
+    def query(self, lexica, k=10, exclude_self=True):
+        '''
+        Return the k closest lexica of every lexicon
+
+        Arguments:
+            lexica: list of lexicon names
+            k: number of neighbours
+            exclude_self: do not return the queried lexicon itself
+        Returns:
+            dictionary of form lexicon:list of (neighbour, distance)
+        '''
+        try:
+            rows = [self.rows[lexicon] for lexicon in lexica]
+        except KeyError as error:
+            raise KeyError('unknown lexicon %s' % error.args[0]) from None
+        neighbours, distances = self.query_rows(rows, k, exclude_self)
+        return {
+            lexicon: [
+                (self.order[neighbour], float(distance))
+                for neighbour, distance in zip(row_neighbours, row_distances)
+            ]
+            for lexicon, row_neighbours, row_distances in zip(lexica, neighbours, distances)
+        }
+
+def pretty_print(results):
+    ''' Return an easy to read list of the neighbours of every lexicon '''
+    result = ''
+    for lexicon, neighbours in results.items():
+        result += lexicon + '\n'
+        for neighbour, distance in neighbours:
+            result += '\t%s\t%.4f\n' % (neighbour, distance)
+    return result
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        'data',
+        help='data to search',
+        choices=['subreddits', 'adjectives', 'frequencies'],
+    )
+    parser.add_argument(
+        'matrix',
+        help='create feature matrix using normal, minimal, maximal or all three values',
+        choices=ACCEPTABLE_OPTIONS,
+    )
+    parser.add_argument(
+        'lexica',
+        nargs='*',
+        help='lexica (subreddits or decades) to find neighbours of, all if none are given'
+    )
+    parser.add_argument(
+        '-k',
+        default=10,
+        help='number of neighbours',
+        type=int
+    )
+    parser.add_argument(
+        '--metric',
+        default='cosine',
+        choices=METRICS,
+        help='distance between the lexica'
+    )
+    parser.add_argument(
+        '--rank',
+        default=None,
+        help='number of leading SVD components to compare (randomized SVD)',
+        type=int
+    )
+    parser.add_argument(
+        '-s',
+        '--sparse',
+        action='store_true',
+        help='store the feature matrices as sparse matrices'
+    )
+    parser.add_argument(
+        '--dtype',
+        default='float64',
+        choices=['float64', 'float32', 'float16'],
+        help='data type of the feature matrices'
+    )
+    args = vars(parser.parse_args())
+    if args['data'] in HISTORICAL_OPTIONS.keys():
+        data_set = HistoricalData(HISTORICAL_OPTIONS[args['data']], args['sparse'],
+                                  dtype=args['dtype'])
+    else:
+        data_set = SubredditData(PATH_CLUSTERS, args['sparse'], dtype=args['dtype'])
+    index = SimilarityIndex(data_set.sentiments[args['matrix']], args['metric'], args['rank'])
+    print(pretty_print(index.query(args['lexica'] or index.order, args['k'])))
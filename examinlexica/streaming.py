@@ -0,0 +1,234 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Out-of-core clustering of very large collections of lexica.
+
+Instead of loading all lexica into memory, the lexica are read in chunks and
+the feature vectors of each chunk are written straight into a npy-file on disk.
+The matrix is then reduced with incremental PCA and clustered with mini batch
+Kmeans, both of which only ever see one chunk of rows at a time. Thus the peak
+memory is bounded by the size of a chunk and not by the number of lexica.
+
+Centering does not change the distances between the lexica, thus if all
+components are kept they are the same as those of the SVD projection used in
+cluster.py. With fewer components (the default, at most the chunk size) the
+result is only approximate: the leading components of the centered data, fitted
+incrementally, differ from the leading SVD components of cluster.py --rank, and
+so do the distances between the lexica.
+'''
+
+import os
+import argparse
+import numpy as np
+import sklearn.cluster as cluster
+from sklearn.decomposition import IncrementalPCA
+
+from examinlexica.helpers import get_words, get_vocabulary, read_lexicon
+from examinlexica.constants import (
+    PATH_CLUSTERS,
+    HISTORICAL_OPTIONS,
+    ACCEPTABLE_OPTIONS
+    )
+
+def chunks(length, chunk_size, minimum=1):
+    '''
+    Return slices of at most chunk_size rows covering range(length).
+    A last chunk smaller than minimum is merged into the chunk before it.
+    '''
+    bounds = list(range(0, length, chunk_size)) + [length]
+    if len(bounds) > 2 and bounds[-1] - bounds[-2] < minimum:
+        del bounds[-2]
+    return [slice(start, end) for start, end in zip(bounds[:-1], bounds[1:])]
+
+def feature_vector(vector, vocabulary, lexicon, view):
+    '''
+    Write the feature vector of one lexicon into vector
+
+    Arguments:
+        vector: array (row of the feature matrix) filled with zeros
+        vocabulary: Vocabulary object
+        lexicon: tuple of words, sentiments and standard derivations
+        view: normal, minimum, maximum or all
+    '''
+    words, sentiments, deviations = lexicon
+    columns = vocabulary.columns(words)
+    used = columns >= 0
+    columns, sentiments, deviations = columns[used], sentiments[used], deviations[used]
+    minimum = np.round(sentiments - deviations, 2)
+    maximum = np.round(sentiments + deviations, 2)
+    if view == 'normal':
+        vector[columns] = sentiments
+    elif view == 'minimum':
+        vector[columns] = minimum
+    elif view == 'maximum':
+        vector[columns] = maximum
+    else:
+        vector[3 * columns] = minimum
+        vector[3 * columns + 1] = sentiments
+        vector[3 * columns + 2] = maximum
+
+def build_matrix(path, view, filename, chunk_size=100, dtype=np.float32):
+    '''
+    Read all lexica in path in chunks and write their feature vectors into a
+    npy-file. Only the word list and one chunk of rows are held in memory. The
+    order of the rows is written to 'order.txt' next to the npy-file, the
+    order.txt of the lexica belongs to the views of Data and is left alone.
+
+    Arguments:
+        path: path to the folder containing the lexica
+        view: normal, minimum, maximum or all
+        filename: npy-file the feature matrix is written to
+        chunk_size: number of lexica read at once
+        dtype: data type of the feature matrix
+    Returns:
+        memory mapped feature matrix, list of lexica in the order of the rows
+    '''
+    files = os.listdir(path)
+    lexica = sorted(data_file for data_file in files if data_file.endswith('tsv'))
+    vocabulary = get_vocabulary(path, get_words(path, files))
+    width = 3 * len(vocabulary) if view == 'all' else len(vocabulary)
+    matrix = np.lib.format.open_memmap(
+        filename + '.tmp',
+        mode='w+',
+        dtype=dtype,
+        shape=(len(lexica), width)
+    )
+    for rows in chunks(len(lexica), chunk_size):
+        block = np.zeros((rows.stop - rows.start, width), dtype=dtype)
+        for vector, lexicon in zip(block, lexica[rows]):
+            feature_vector(vector, vocabulary, read_lexicon(path + lexicon), view)
+        matrix[rows] = block
+        matrix.flush()
+    del matrix
+    os.replace(filename + '.tmp', filename)
+    with open(os.path.join(os.path.dirname(filename), 'order.txt'), 'w') as order_in_file:
+        order_in_file.write('\n'.join(lexica))
+    return np.load(filename, mmap_mode='r'), lexica
+
+def incremental_projection(matrix, n_components, chunk_size=100):
+    '''
+    Reduce the feature matrix chunk by chunk with incremental PCA
+
+    Arguments:
+        matrix: (memory mapped) feature matrix
+        n_components: number of components, at most chunk_size
+        chunk_size: number of rows processed at once
+    Returns:
+        array of form lexica x n_components
+    '''
+    n_components = min(n_components, chunk_size, *matrix.shape)
+    pca = IncrementalPCA(n_components=n_components)
+    batches = chunks(matrix.shape[0], chunk_size, n_components)
+    for rows in batches:
+        pca.partial_fit(np.asarray(matrix[rows], dtype=np.float32))
+    return np.concatenate([
+        pca.transform(np.asarray(matrix[rows], dtype=np.float32)) for rows in batches
+    ])
+
+def minibatch_labels(data, number_of_clusters, chunk_size=100, epochs=10):
+    '''
+    Cluster data chunk by chunk with mini batch Kmeans
+
+    Arguments:
+        data: (memory mapped) data to be clustered
+        number_of_clusters: number of clusters
+        chunk_size: number of rows processed at once
+        epochs: number of passes over all chunks
+    Returns:
+        array of labels
+    '''
+    batches = chunks(data.shape[0], chunk_size, number_of_clusters)
+    kmeans = cluster.MiniBatchKMeans(n_clusters=number_of_clusters, random_state=0)
+    for _ in range(epochs):
+        for rows in batches:
+            kmeans.partial_fit(np.asarray(data[rows]))
+    return np.concatenate([kmeans.predict(np.asarray(data[rows])) for rows in batches])
+
+def stream_cluster(path, view, number_of_clusters, result_folder, chunk_size=100,
+                   n_components=100, dtype=np.float32):
+    '''
+    Build, reduce and cluster a feature matrix out of core. The labels are
+    saved like the results of cluster.py, the feature matrix and the order of
+    the lexica in 'result_folder_stream'. Read the labels back with
+    ClusteredData('result_folder_stream/', 'result_folder_results').
+
+    Arguments:
+        path: path to the folder containing the lexica
+        view: normal, minimum, maximum or all
+        number_of_clusters: number of clusters
+        result_folder: path to a folder, in which the results are stored
+        chunk_size: number of lexica processed at once
+        n_components: number of components kept by the incremental PCA
+        dtype: data type of the feature matrix on disk
+    Returns:
+        array of labels
+    '''
+    results = result_folder + '_results'
+    stream = result_folder + '_stream'
+    for folder in [results, stream]:
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+    matrix, _ = build_matrix(
+        path,
+        view,
+        os.path.join(stream, view + '_matrix.npy'),
+        chunk_size,
+        dtype
+    )
+    projection = incremental_projection(matrix, n_components, chunk_size)
+    labels = minibatch_labels(projection, number_of_clusters, chunk_size)
+    name = view + '_Kmeans_' + str(number_of_clusters)
+    np.save(results + '/' + name + '_labels.npy', labels)
+    return labels
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        'data',
+        help='data to be clustered',
+        choices=['subreddits', 'adjectives', 'frequencies'],
+    )
+    parser.add_argument(
+        'matrix',
+        help='create feature matrix using normal, minimal, maximal or all three values',
+        choices=ACCEPTABLE_OPTIONS,
+    )
+    parser.add_argument(
+        '-c',
+        '--clusters',
+        default=10,
+        help='number of clusters used for mini batch Kmeans',
+        type=int
+    )
+    parser.add_argument(
+        '-r',
+        '--results',
+        default='./',
+        help='folder for the results of clustering'
+    )
+    parser.add_argument(
+        '--chunk',
+        default=100,
+        help='number of lexica held in memory at once',
+        type=int
+    )
+    parser.add_argument(
+        '--components',
+        default=100,
+        help='number of components kept by the incremental PCA',
+        type=int
+    )
+    args = vars(parser.parse_args())
+    if args['data'] in HISTORICAL_OPTIONS.keys():
+        data_path = HISTORICAL_OPTIONS[args['data']]
+    else:
+        data_path = PATH_CLUSTERS
+    stream_cluster(
+        data_path,
+        args['matrix'],
+        args['clusters'],
+        args['results'],
+        args['chunk'],
+        args['components']
+    )
@@ -0,0 +1,69 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Run many independent clustering jobs on the same views in parallel.
+
+A sweep (e.g. Kmeans for every number of clusters of every view) consists of
+small jobs working on a few projected views. The projections are handed to each
+worker process once, afterwards only the job arguments and the results are sent
+between the processes. Every worker limits the threads of BLAS/OpenMP, so the
+workers do not compete for the cores and the sweep scales with the number of
+processes instead.
+
+The results are yielded in the order of the jobs as soon as they are finished,
+thus a caller can use the first results while the later jobs are still running.
+'''
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from threadpoolctl import threadpool_limits
+
+# data of the sweep held by each worker process
+WORKER_DATA = {}
+
+def thread_budget(workers, threads=None):
+    ''' Return number of BLAS threads per worker, by default the cores are split evenly '''
+    if threads:
+        return threads
+    return max(1, (os.cpu_count() or 1) // workers)
+
+def init_worker(data, threads):
+    ''' Store the data of the sweep and limit the threads of the worker process '''
+    WORKER_DATA.clear()
+    WORKER_DATA.update(data)
+    threadpool_limits(limits=threads)
+
+def run_job(function, key, arguments):
+    ''' Apply function to the data of key in a worker process '''
+    return function(WORKER_DATA[key], *arguments)
+
+def run_sweep(data, jobs, function, workers=None, threads=None):
+    '''
+    Apply function to the data of every job
+
+    Arguments:
+        data: dictionary of form key:array shared by all jobs, e.g. view:projection
+        jobs: list of (key, arguments)
+        function: function at module level, called as function(data[key], *arguments)
+        workers: number of processes, None for one per core, 1 to run all jobs
+            in this process
+        threads: BLAS threads per process, None to split the cores evenly
+    Yields:
+        key, arguments and result of every job in the order of jobs
+    '''
+    workers = min(workers or os.cpu_count() or 1, max(len(jobs), 1))
+    if workers == 1:
+        for key, arguments in jobs:
+            yield key, arguments, function(data[key], *arguments)
+        return
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(data, thread_budget(workers, threads))
+        ) as executor:
+        futures = [
+            executor.submit(run_job, function, key, arguments) for key, arguments in jobs
+        ]
+        for (key, arguments), future in zip(jobs, futures):
+            yield key, arguments, future.result()
@@ -0,0 +1,179 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Visualize clustering results in three dimensions using t-SNE.
+
+t-SNE is by far the slowest step of clustering and its result does not depend
+on the clusters, thus the embedding of a view is computed only once per seed and
+stored next to the projection of the view. It is initialized from the leading
+SVD components (the cached projection), which makes it deterministic and lets it
+converge faster than from a random start.
+
+Plotting is a separate stage: either pass --plot to cluster.py/get_clusters.py
+or plot all labels of a results folder afterwards using this script.
+'''
+
+import os
+import argparse
+import numpy as np
+from sklearn.manifold import TSNE
+
+from examinlexica.reduction import (
+    project,
+    load_projection,
+    save_projection,
+    remember_projection,
+    PROJECTIONS
+    )
+from examinlexica.original.subreddit_data import SubredditData
+from examinlexica.original.historical_data import HistoricalData
+from examinlexica.constants import (
+    PATH_CLUSTERS,
+    HISTORICAL_OPTIONS,
+    ACCEPTABLE_OPTIONS
+    )
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from mpl_toolkits.mplot3d import Axes3D
+
+def embedding_name(filename, seed):
+    ''' Return filename of the embedding of the projection in filename '''
+    folder, name = os.path.split(filename)
+    return os.path.join(folder, 'tsne%i_%s' % (seed, name))
+
+def compute_embedding(projection, seed):
+    ''' Return three dimensional t-SNE embedding initialized with the SVD '''
+    init = np.zeros((projection.shape[0], 3))
+    components = min(3, projection.shape[1])
+    init[:, :components] = projection[:, :components]
+    # same scaling as the PCA initialization of sklearn
+    init = init / np.std(init[:, 0]) * 1e-4
+    return TSNE(
+        n_components=3,
+        init=init,
+        perplexity=min(30.0, projection.shape[0] - 1),
+        random_state=seed
+    ).fit_transform(projection)
+
+def embed(data, seed=0, projection=None):
+    '''
+    Return the t-SNE embedding of a view
+
+    If data is a view with a fingerprint (SentimentMatrix), the embedding is
+    looked up in memory and on disk first and only computed if it is not
+    cached yet.
+
+    Arguments:
+        data: feature matrix
+        seed: random state of t-SNE
+        projection: projection of data with all components, computed if None
+    Returns:
+        numpy array of form lexica x 3
+    '''
+    key = getattr(data, 'fingerprint', None)
+    filename = getattr(data, 'projection_file', None)
+    if projection is None and key is None:
+        projection = project(data)
+    if key is None:
+        return compute_embedding(projection, seed)
+    key = (key, 'tsne', seed)
+    if key in PROJECTIONS:
+        PROJECTIONS.move_to_end(key)
+        return PROJECTIONS[key].copy()
+    filename = embedding_name(filename, seed) if filename else None
+    embedding = load_projection(filename) if filename else None
+    if embedding is None or embedding.shape[0] != data.shape[0]:
+        # the projection keeps all distances, t-SNE never sees the (sparse) raw view
+        if projection is None:
+            projection = project(data)
+        embedding = compute_embedding(projection, seed)
+        if filename:
+            save_projection(filename, embedding)
+    remember_projection(key, embedding)
+    return embedding.copy()
+
+def plot_clusters(embedding, labels, name):
+    '''
+    Draw the clusters into the embedding and save the graph in graphs/name.png
+
+    Arguments:
+        embedding: t-SNE embedding of form lexica x 3
+        labels: cluster of every lexicon
+        name: name of the graph
+    '''
+    vis_x = embedding[:, 0]
+    vis_y = embedding[:, 1]
+    vis_z = embedding[:, 2]
+    fig = plt.figure(figsize=(12, 10))
+    ax = fig.add_subplot(111, projection='3d')
+    colors = [plt.cm.plasma(float(i)/max(labels)) for i in labels]
+    classes = list(set(labels))
+    if not os.path.exists('graphs'):
+        os.makedirs('graphs')
+    for i, u in enumerate(classes):
+        v_x = [vis_x[j] for j in range(len(vis_x)) if labels[j] == u]
+        v_y = [vis_y[j] for j in range(len(vis_y)) if labels[j] == u]
+        v_z = [vis_z[j] for j in range(len(vis_z)) if labels[j] == u]
+        ax.scatter(v_x, v_y, v_z, c=colors[i], s=150,label=str(u))
+    plt.legend()
+    plt.savefig('graphs/' + name + '.png', bbox_inches='tight')
+    plt.close(fig)
+
+def plot_results(data, matrix, result_folder, seed=0):
+    '''
+    Plot all labels of a view saved in the results folder
+
+    Arguments:
+        data: dictionary of views (sentiments of a Data object)
+        matrix: normal, minimum, maximum or all
+        result_folder: folder passed as results to cluster.py
+        seed: random state of t-SNE
+    '''
+    results = result_folder + '_results'
+    embedding = None
+    for label_file in sorted(os.listdir(results)):
+        if label_file.startswith(matrix + '_') and label_file.endswith('_labels.npy'):
+            if embedding is None:
+                embedding = embed(data[matrix], seed)
+            labels = np.load(os.path.join(results, label_file))
+            plot_clusters(embedding, labels, label_file[:-len('_labels.npy')])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        'data',
+        help='data that was clustered',
+        choices=['subreddits', 'adjectives', 'frequencies'],
+    )
+    parser.add_argument(
+        'matrix',
+        help='feature matrix that was clustered',
+        choices=ACCEPTABLE_OPTIONS,
+    )
+    parser.add_argument(
+        '-r',
+        '--results',
+        default='./',
+        help='folder for the results of clustering'
+    )
+    parser.add_argument(
+        '--seed',
+        default=0,
+        help='random state of t-SNE',
+        type=int
+    )
+    parser.add_argument(
+        '-s',
+        '--sparse',
+        action='store_true',
+        help='store the feature matrices as sparse matrices'
+    )
+    args = vars(parser.parse_args())
+    if args['data'] in HISTORICAL_OPTIONS.keys():
+        data_set = HistoricalData(HISTORICAL_OPTIONS[args['data']], args['sparse'])
+    else:
+        data_set = SubredditData(PATH_CLUSTERS, args['sparse'])
+    plot_results(data_set.sentiments, args['matrix'], args['results'], args['seed'])
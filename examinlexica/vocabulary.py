@@ -0,0 +1,103 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Index of the word list of a folder of lexica.
+
+The position of a word in the word list is its column in the feature matrices.
+The index maps words to their columns and back without scanning the list:
+words are looked up in a sorted permutation of the word list, so a whole batch
+of words is translated to columns in one vectorized call. The index is saved
+next to the word list (vocabulary.npz) and rebuilt once the word list changes.
+'''
+
+import os
+import hashlib
+import numpy as np
+
+class Vocabulary:
+    '''
+    Index of all words of the feature matrices.
+
+    Attributes:
+        words: array of all words, the position of a word is its column
+        sorter: permutation of words sorting them alphabetically
+        fingerprint: fingerprint of the word list
+    '''
+    def __init__(self, words, sorter=None, fingerprint=None):
+        '''
+        Arguments:
+            words: list or array of all words in column order
+            sorter: permutation sorting words, computed if not given
+            fingerprint: fingerprint of words, computed if not given
+        '''
+        self.words = np.asarray(words, dtype=str)
+        if sorter is None:
+            sorter = np.argsort(self.words, kind='stable')
+        self.sorter = sorter
+        if fingerprint is None:
+            fingerprint = words_fingerprint(self.words)
+        self.fingerprint = fingerprint
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        return self.columns([word])[0] >= 0
+
+    def __getitem__(self, column):
+        ''' Return word(s) of one or many columns '''
+        return self.words[column]
+
+    def column(self, word):
+        ''' Return column of a word, raise KeyError for unknown words '''
+        column = self.columns([word])[0]
+        if column < 0:
+            raise KeyError(word)
+        return int(column)
+
+    def columns(self, words, missing=-1):
+        '''
+        Return columns of a batch of words
+
+        Arguments:
+            words: list or array of words
+            missing: column returned for unknown words
+        Returns:
+            array of columns
+        '''
+        words = np.asarray(words, dtype=str)
+        if not len(self.words):
+            return np.full(len(words), missing, dtype=np.int64)
+        positions = np.searchsorted(self.words, words, sorter=self.sorter)
+        columns = self.sorter[np.minimum(positions, len(self.words) - 1)].astype(np.int64)
+        columns[self.words[columns] != words] = missing
+        return columns
+
+    def save(self, filename, source_fingerprint):
+        ''' Save index as npz-file tagged with the fingerprint of the word list '''
+        with open(filename + '.tmp', 'wb') as f:
+            np.savez(
+                f,
+                fingerprint=np.array(source_fingerprint),
+                words=self.words,
+                sorter=self.sorter
+            )
+        os.replace(filename + '.tmp', filename)
+
+    @classmethod
+    def load(cls, filename, source_fingerprint):
+        ''' Load index from npz-file, return None if it is missing or stale '''
+        if not os.path.exists(filename):
+            return None
+        try:
+            with np.load(filename) as index:
+                if str(index['fingerprint']) != source_fingerprint:
+                    return None
+                return cls(index['words'], index['sorter'], source_fingerprint)
+        except (OSError, KeyError, ValueError):
+            return None
+
+def words_fingerprint(words):
+    ''' Return fingerprint of a word list '''
+    return hashlib.sha1('\n'.join(words).encode()).hexdigest()
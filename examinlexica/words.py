@@ -0,0 +1,243 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Cluster the words by their sentiments in all lexica.
+
+The feature matrix of a word is the transposed view: one row per word holding
+its sentiment in every lexicon (for the view all its minimal, normal and maximal
+sentiment in every lexicon). With tens of thousands of words neither the full
+SVD nor the pairwise distances of cluster.py are feasible, thus the word matrix
+is reduced to its leading components by a randomized SVD (cached next to the
+projection of the view, see reduction.py) and clustered with one of
+    minibatch   mini batch Kmeans fitted chunk by chunk (see streaming.py)
+    HDBSCAN     HDBSCAN on a KD-tree of the reduced words, using the
+                approximate minimum spanning tree of the Boruvka algorithm
+For the cosine metric the reduced words are scaled to unit length first.
+
+The words of each cluster are written to 'view_words_algorithm.txt' in the
+results folder one cluster per line, the labels to
+'view_words_algorithm_labels.npy' (in the order of the word list).
+'''
+
+import os
+import argparse
+import numpy as np
+from scipy import sparse as sp
+import hdbscan
+
+from examinlexica.reduction import project
+from examinlexica.pairwise import METRICS
+from examinlexica.streaming import minibatch_labels
+from examinlexica.original.matrix import SentimentMatrix
+from examinlexica.original.subreddit_data import SubredditData
+from examinlexica.original.historical_data import HistoricalData
+from examinlexica.constants import (
+    PATH_CLUSTERS,
+    HISTORICAL_OPTIONS,
+    ACCEPTABLE_OPTIONS
+    )
+
+WORD_ALGORITHMS = ['minibatch', 'HDBSCAN']
+
+def word_matrix(data):
+    '''
+    Return the transposed view of form words x lexica (words x lexica * 3 for
+    the view all) as SentimentMatrix, whose projection is cached next to the
+    projection of the view.
+    '''
+    values = data.values
+    if data.view == 'all':
+        # columns of the view all are word0min, word0, word0max, word1min, ...
+        if sp.issparse(values):
+            values = sp.hstack([values[:, statistic::3].T for statistic in range(3)])
+        else:
+            lexica = values.shape[0]
+            values = np.asarray(values).reshape(lexica, -1, 3).transpose(1, 2, 0)
+            values = values.reshape(values.shape[0], -1)
+    else:
+        values = values.T
+    if sp.issparse(values):
+        values = sp.csr_matrix(values)
+    fingerprint = data.fingerprint and 'words_' + data.fingerprint
+    filename = data.projection_file
+    if filename:
+        folder, name = os.path.split(filename)
+        filename = os.path.join(folder, 'words_' + name)
+    return SentimentMatrix(
+        values,
+        data.view,
+        data.vocabulary.words,
+        None,
+        data.vocabulary,
+        fingerprint,
+        filename
+    )
+
+def reduce_words(data, rank=50, metric='euclidean'):
+    ''' Return the words of a view reduced to rank components '''
+    if metric not in METRICS:
+        raise ValueError('unknown metric %s' % metric)
+    reduced = project(word_matrix(data), rank)
+    if metric == 'cosine':
+        lengths = np.sqrt(np.einsum('ij,ij->i', reduced, reduced))
+        lengths[lengths == 0] = np.inf
+        reduced = reduced / lengths[:, None]
+    return reduced
+
+def word_labels(reduced, algorithm, number_of_clusters=100, min_cluster_size=10,
+                min_samples=None, chunk_size=1024):
+    '''
+    Cluster the reduced words
+
+    Arguments:
+        reduced: reduced word matrix
+        algorithm: minibatch or HDBSCAN
+        number_of_clusters: number of clusters of mini batch Kmeans
+        min_cluster_size: min_cluster_size of HDBSCAN
+        min_samples: min_samples of HDBSCAN, None for min_cluster_size
+        chunk_size: number of words processed at once by mini batch Kmeans
+    Returns:
+        array of labels (-1: noise)
+    '''
+    if algorithm == 'minibatch':
+        return minibatch_labels(reduced, number_of_clusters, chunk_size)
+    if algorithm == 'HDBSCAN':
+        return hdbscan.HDBSCAN(
+            min_cluster_size=min_cluster_size,
+            min_samples=min_samples,
+            algorithm='boruvka_kdtree',
+            approx_min_span_tree=True,
+            core_dist_n_jobs=1
+        ).fit_predict(np.asarray(reduced, dtype=np.float64))
+    raise ValueError('unknown algorithm %s' % algorithm)
+
+def write_clusters(filename, words, labels):
+    '''
+    Write the words of every cluster to filename, one cluster per line
+    (label, size, words). Clusters are written one at a time, the whole
+    listing is never held in memory.
+    '''
+    order = np.argsort(labels, kind='stable')
+    bounds = np.flatnonzero(np.diff(labels[order])) + 1
+    with open(filename, 'w') as f:
+        for members in np.split(order, bounds):
+            if not len(members):
+                continue
+            f.write('%i\t%i\t%s\n' % (labels[members[0]], len(members), ' '.join(words[members])))
+
+def cluster_words(data, algorithm, result_folder, rank=50, metric='euclidean', **kwds):
+    '''
+    Reduce and cluster the words of a view and save the clusters
+
+    Arguments:
+        data: feature matrix of a view (SentimentMatrix)
+        algorithm: minibatch or HDBSCAN
+        result_folder: folder for the word lists and the labels
+        rank: number of leading SVD components of the words
+        metric: euclidean or cosine
+        kwds: parameters of word_labels
+    Returns:
+        labels, filename of the word lists
+    '''
+    labels = word_labels(reduce_words(data, rank, metric), algorithm, **kwds)
+    if not os.path.exists(result_folder):
+        os.makedirs(result_folder)
+    name = os.path.join(result_folder, '%s_words_%s' % (data.view, algorithm))
+    np.save(name + '_labels.npy', labels)
+    write_clusters(name + '.txt', data.vocabulary.words, labels)
+    return labels, name + '.txt'
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        'data',
+        help='data whose words are clustered',
+        choices=['subreddits', 'adjectives', 'frequencies'],
+    )
+    parser.add_argument(
+        'matrix',
+        help='create feature matrix using normal, minimal, maximal or all three values',
+        choices=ACCEPTABLE_OPTIONS,
+    )
+    parser.add_argument(
+        '-a',
+        '--algorithm',
+        default='minibatch',
+        choices=WORD_ALGORITHMS,
+        help='algorithm to use for clustering'
+    )
+    parser.add_argument(
+        '-c',
+        '--clusters',
+        default=100,
+        help='number of clusters of mini batch Kmeans',
+        type=int
+    )
+    parser.add_argument(
+        '--rank',
+        default=50,
+        help='number of leading SVD components of the words',
+        type=int
+    )
+    parser.add_argument(
+        '--metric',
+        default='euclidean',
+        choices=METRICS,
+        help='distance between the words'
+    )
+    parser.add_argument(
+        '--min_cluster_size',
+        default=10,
+        help='min_cluster_size of HDBSCAN',
+        type=int
+    )
+    parser.add_argument(
+        '--min_samples',
+        default=None,
+        help='min_samples of HDBSCAN',
+        type=int
+    )
+    parser.add_argument(
+        '--chunk',
+        default=1024,
+        help='number of words processed at once by mini batch Kmeans',
+        type=int
+    )
+    parser.add_argument(
+        '-s',
+        '--sparse',
+        action='store_true',
+        help='store the feature matrices as sparse matrices'
+    )
+    parser.add_argument(
+        '--dtype',
+        default='float64',
+        choices=['float64', 'float32', 'float16'],
+        help='data type of the feature matrices'
+    )
+    parser.add_argument(
+        '-r',
+        '--results',
+        default='_words',
+        help='folder for the word lists'
+    )
+    args = vars(parser.parse_args())
+    if args['data'] in HISTORICAL_OPTIONS.keys():
+        data_set = HistoricalData(HISTORICAL_OPTIONS[args['data']], args['sparse'],
+                                  dtype=args['dtype'])
+    else:
+        data_set = SubredditData(PATH_CLUSTERS, args['sparse'], dtype=args['dtype'])
+    word_clusters, word_file = cluster_words(
+        data_set.sentiments[args['matrix']],
+        args['algorithm'],
+        args['results'],
+        args['rank'],
+        args['metric'],
+        number_of_clusters=args['clusters'],
+        min_cluster_size=args['min_cluster_size'],
+        min_samples=args['min_samples'],
+        chunk_size=args['chunk']
+    )
+    print('%i clusters, %i words without cluster, written to %s' % (
+        len(set(word_clusters) - {-1}), np.sum(word_clusters == -1), word_file))
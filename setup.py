@@ -17,9 +17,11 @@ setup(name='examinlexica',
         'examinlexica.original'
     ],
       package_data = {'examinlexica' : ['historical/*.tsv', 'subreddits/*.tsv']},
-      setup_requires=['numpy', 'scipy', 'cython','spacy', 'hdbscan', 'matplotlib'],
+      setup_requires=['numpy', 'scipy', 'cython','spacy', 'hdbscan==0.8.44', 'matplotlib'],
       install_requires=[
-          'pandas',
           'scikit-learn',
+          'threadpoolctl',
+          # hdbscan_grid.py uses a private function of hdbscan, see there
+          'hdbscan==0.8.44',
       ],
      )